@@ -5,56 +5,92 @@
 
 
 
-import pandas as pd  # pip install pandas openpyxl
-import plotly.express as px  # pip install plotly-express
 import streamlit as st  # pip install streamlit
 
+from sales_charts import FigureCache, figure_dict, hourly_sales_figure, product_sales_figure, selection_key
+from sales_cube import SalesCube
+from sales_filter import SalesFilter
+from sales_store import ensure_sales_store, read_sales, sales_version
+from result_cache import disk_cached
+
 # emojis: https://www.webfx.com/tools/emoji-cheat-sheet/
 st.set_page_config(page_title="Sales Dashboard", page_icon=":bar_chart:", layout="wide")
 
 # ---- READ EXCEL ----
-@st.cache_data
-def get_data_from_excel():
-    df = pd.read_excel(
-        io="supermarkt_sales.xlsx",
-        engine="openpyxl",
-        sheet_name="Sales",
-        skiprows=3,
-        usecols="B:R",
-        nrows=1000,
-    )
-    # Add 'hour' column to dataframe
-    df["hour"] = pd.to_datetime(df["Time"], format="%H:%M:%S").dt.hour
-    return df
-
-df = get_data_from_excel()
+# One entry each: a new store version replaces the old data instead of piling up next to it
+@st.cache_resource(max_entries=1)
+def get_data_from_excel(store_path, store_version):
+    # Read the sales store and encode the filter columns once per version;
+    # openpyxl only runs when the workbook changed
+    return SalesFilter(read_sales(store_path))
+
+@st.cache_resource(max_entries=1)
+def get_sales_cube(store_path, store_version):
+    # Sums and counts per City x Customer_type x Gender x Product line x hour
+    return SalesCube(get_data_from_excel(store_path, store_version).data)
+
+@st.cache_resource(max_entries=1)
+def get_figure_cache(store_path, store_version):
+    # Figure dicts per normalized selection, least recently used evicted
+    return FigureCache()
+
+@disk_cached
+def build_sales_view(_cube, store_version, view_key, _selection):
+    # KPIs and ready-to-send chart dicts of one selection, kept in the disk
+    # cache shared by all server processes under the store version and key;
+    # _cube is the store version's cube
+    kpis = _cube.kpis(_selection)
+    if kpis["rows"] == 0:
+        return kpis, None
+    sales_by_product_line = _cube.sum_by("Product line", _selection).sort_values(by="Total")
+    sales_by_hour = _cube.sum_by("hour", _selection).sort_index()
+    figures = {
+        "hourly": figure_dict(hourly_sales_figure(sales_by_hour)),
+        "product": figure_dict(product_sales_figure(sales_by_product_line)),
+    }
+    return kpis, figures
+
+sales_store_path = ensure_sales_store("supermarkt_sales.xlsx")
+sales_store_version = sales_version(sales_store_path)
+sales = get_data_from_excel(sales_store_path, sales_store_version)
+cube = get_sales_cube(sales_store_path, sales_store_version)
+figure_cache = get_figure_cache(sales_store_path, sales_store_version)
 
 # ---- SIDEBAR ----
 st.sidebar.header("Please Filter Here:")
 city = st.sidebar.multiselect(
     "Select the City:",
-    options=df["City"].unique(),
-    default=df["City"].unique()
+    options=sales.options("City"),
+    default=sales.options("City")
 )
 
 customer_type = st.sidebar.multiselect(
     "Select the Customer Type:",
-    options=df["Customer_type"].unique(),
-    default=df["Customer_type"].unique(),
+    options=sales.options("Customer_type"),
+    default=sales.options("Customer_type"),
 )
 
 gender = st.sidebar.multiselect(
     "Select the Gender:",
-    options=df["Gender"].unique(),
-    default=df["Gender"].unique()
-)
-
-df_selection = df.query(
-    "City == @city & Customer_type ==@customer_type & Gender == @gender"
+    options=sales.options("Gender"),
+    default=sales.options("Gender")
 )
 
-# Check if the dataframe is empty:
-if df_selection.empty:
+# KPIs and charts are summed from the cube cells matching the filters,
+# selected with code lookup-table masks instead of a query per rerun.
+# A selection seen before is served from the figure cache without any
+# pandas or plotly work, or from the disk cache if another server process
+# (or this one, before a restart) built it.
+selection = {"City": city, "Customer_type": customer_type, "Gender": gender}
+view_key = selection_key(selection)
+view = figure_cache.get(view_key)
+if view is None:
+    view = build_sales_view(cube, sales_store_version, view_key, selection)
+    figure_cache.put(view_key, view)
+kpis, figures = view
+
+# Check if the selection is empty:
+if kpis["rows"] == 0:
     st.warning("No data available based on the current filter settings!")
     st.stop() # This will halt the app from further execution.
 
@@ -63,10 +99,10 @@ st.title(":bar_chart: Sales Dashboard")
 st.markdown("##")
 
 # TOP KPI's
-total_sales = int(df_selection["Total"].sum())
-average_rating = round(df_selection["Rating"].mean(), 1)
+total_sales = int(kpis["total_sales"])
+average_rating = round(kpis["average_rating"], 1)
 star_rating = ":star:" * int(round(average_rating, 0))
-average_sale_by_transaction = round(df_selection["Total"].mean(), 2)
+average_sale_by_transaction = round(kpis["average_sale"], 2)
 
 left_column, middle_column, right_column = st.columns(3)
 with left_column:
@@ -81,42 +117,10 @@ with right_column:
 
 st.markdown("""---""")
 
-# SALES BY PRODUCT LINE [BAR CHART]
-sales_by_product_line = df_selection.groupby(by=["Product line"])[["Total"]].sum().sort_values(by="Total")
-fig_product_sales = px.bar(
-    sales_by_product_line,
-    x="Total",
-    y=sales_by_product_line.index,
-    orientation="h",
-    title="<b>Sales by Product Line</b>",
-    color_discrete_sequence=["#0083B8"] * len(sales_by_product_line),
-    template="plotly_white",
-)
-fig_product_sales.update_layout(
-    plot_bgcolor="rgba(0,0,0,0)",
-    xaxis=(dict(showgrid=False))
-)
-
-# SALES BY HOUR [BAR CHART]
-sales_by_hour = df_selection.groupby(by=["hour"])[["Total"]].sum()
-fig_hourly_sales = px.bar(
-    sales_by_hour,
-    x=sales_by_hour.index,
-    y="Total",
-    title="<b>Sales by hour</b>",
-    color_discrete_sequence=["#0083B8"] * len(sales_by_hour),
-    template="plotly_white",
-)
-fig_hourly_sales.update_layout(
-    xaxis=dict(tickmode="linear"),
-    plot_bgcolor="rgba(0,0,0,0)",
-    yaxis=(dict(showgrid=False)),
-)
-
-
+# SALES BY HOUR / PRODUCT LINE [BAR CHARTS]
 left_column, right_column = st.columns(2)
-left_column.plotly_chart(fig_hourly_sales, use_container_width=True)
-right_column.plotly_chart(fig_product_sales, use_container_width=True)
+left_column.plotly_chart(figures["hourly"], use_container_width=True)
+right_column.plotly_chart(figures["product"], use_container_width=True)
 
 
 # ---- HIDE STREAMLIT STYLE ----
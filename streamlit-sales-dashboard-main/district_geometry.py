@@ -0,0 +1,218 @@
+import json
+from functools import lru_cache
+
+import numpy as np
+
+GEO_JSON_PATH = 'bd_jeoson.json'
+
+# Douglas-Peucker tolerance (degrees) and coordinate decimals per map zoom.
+# At zoom 6 a screen pixel covers roughly 2 km, so 0.01 degrees is invisible.
+ZOOM_LEVELS = {
+    6: (0.01, 3),
+    8: (0.0025, 4),
+    10: (0.0005, 4),
+}
+
+# Ticket District spellings that differ from the boundary file's ADM2_EN names
+DISTRICT_ALIASES = {
+    'Bogra': 'Bogura',
+    'Chapai nawabganj': 'Chapainawabganj',
+    'Chittagong': 'Chattogram',
+    'Coxsbazar': "Cox's Bazar",
+    'Khagracchari': 'Khagrachhari',
+}
+
+# Feature properties the dashboards use; the rest is dropped from the payload
+DISTRICT_PROPERTIES = ['ADM2_EN', 'ADM2_PCODE', 'ADM1_EN']
+
+
+@lru_cache(maxsize=None)
+def load_districts(geo_json_path=GEO_JSON_PATH):
+    """Full-resolution district boundaries, parsed once per process.
+
+    The returned dict is shared between callers and must not be modified.
+    """
+    with open(geo_json_path, 'r') as f:
+        return json.load(f)
+
+
+def simplify_ring(ring, tolerance):
+    # Iterative Douglas-Peucker over an (n, 2) array of a closed ring
+    if len(ring) <= 4:
+        return ring
+    keep = np.zeros(len(ring), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(ring) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = ring[first], ring[last]
+        inner = ring[first + 1:last]
+        dx, dy = end - start
+        length = np.hypot(dx, dy)
+        if length == 0:
+            # The first and last point of a closed ring coincide
+            distances = np.hypot(inner[:, 0] - start[0], inner[:, 1] - start[1])
+        else:
+            distances = np.abs(dx * (inner[:, 1] - start[1]) - dy * (inner[:, 0] - start[0])) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return ring[keep]
+
+
+def quantize_ring(ring, decimals):
+    # Round coordinates and drop the consecutive duplicates this creates
+    ring = np.round(ring, decimals)
+    repeated = np.all(ring[1:] == ring[:-1], axis=1)
+    return np.vstack([ring[:1], ring[1:][~repeated]])
+
+
+def simplify_polygon(polygon, tolerance, decimals):
+    rings = []
+    for ring in polygon:
+        ring = quantize_ring(simplify_ring(np.asarray(ring, dtype=float), tolerance), decimals)
+        # A ring needs at least three distinct corners to stay a polygon
+        if len(ring) >= 4:
+            rings.append(ring.tolist())
+        elif not rings:
+            return None
+    return rings
+
+
+def simplify_geometry(geometry, tolerance, decimals):
+    polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+    simplified = [p for p in (simplify_polygon(p, tolerance, decimals) for p in polygons) if p]
+    if not simplified:
+        # Keep tiny districts visible with their rounded original outline
+        simplified = [[np.round(np.asarray(ring, dtype=float), decimals).tolist() for ring in polygons[0]]]
+    return {'type': 'MultiPolygon', 'coordinates': simplified}
+
+
+def zoom_level(zoom):
+    # Closest configured zoom at or below the requested one
+    levels = [level for level in sorted(ZOOM_LEVELS) if level <= zoom]
+    return levels[-1] if levels else min(ZOOM_LEVELS)
+
+
+@lru_cache(maxsize=None)
+def district_layer(zoom=6, geo_json_path=GEO_JSON_PATH):
+    """Simplified, quantized district FeatureCollection for a map zoom.
+
+    Built once per process and zoom level. Each feature carries its ADM2_PCODE
+    as id, so folium does not need to add identifiers to the shared dict.
+    """
+    tolerance, decimals = ZOOM_LEVELS[zoom_level(zoom)]
+    features = []
+    for feature in load_districts(geo_json_path)['features']:
+        properties = {key: feature['properties'].get(key) for key in DISTRICT_PROPERTIES}
+        features.append({
+            'type': 'Feature',
+            'id': properties['ADM2_PCODE'],
+            'properties': properties,
+            'geometry': simplify_geometry(feature['geometry'], tolerance, decimals),
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+# Grid cell size (degrees) of the DistrictLocator's bounding-box index
+LOCATOR_CELL_SIZE = 0.25
+
+# Upper bound on point x edge comparisons per vectorized point-in-polygon step
+PIP_BLOCK_SIZE = 2_000_000
+
+
+def polygon_edges(geometry):
+    # Every ring edge of a (Multi)Polygon as x1, y1, x2, y2 arrays
+    polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+    rings = [np.asarray(ring, dtype=float) for polygon in polygons for ring in polygon]
+    starts = np.vstack([ring[:-1] for ring in rings])
+    ends = np.vstack([ring[1:] for ring in rings])
+    return starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]
+
+
+def points_in_edges(lon, lat, edges):
+    """Even-odd ray casting of many points against one district's edges.
+
+    Holes and multiple parts need no special handling: a point is inside when
+    a ray from it crosses the district's rings an odd number of times.
+    """
+    x1, y1, x2, y2 = edges
+    inside = np.zeros(len(lon), dtype=bool)
+    block = max(1, PIP_BLOCK_SIZE // len(x1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for first in range(0, len(lon), block):
+            px = lon[first:first + block, None]
+            py = lat[first:first + block, None]
+            straddles = (y1 > py) != (y2 > py)
+            crossing_x = (x2 - x1) * (py - y1) / (y2 - y1) + x1
+            crossings = np.count_nonzero(straddles & (px < crossing_x), axis=1)
+            inside[first:first + block] = crossings % 2 == 1
+    return inside
+
+
+class DistrictLocator:
+    """Assigns coordinates to the district polygon that contains them.
+
+    A coarse grid maps each cell to the districts whose bounding box overlaps
+    it, so each point is only tested against a handful of candidate polygons.
+    """
+
+    def __init__(self, geo_json_path=GEO_JSON_PATH, cell_size=LOCATOR_CELL_SIZE):
+        features = load_districts(geo_json_path)['features']
+        self.names = np.array([feature['properties']['ADM2_EN'] for feature in features], dtype=object)
+        self.edges = [polygon_edges(feature['geometry']) for feature in features]
+        self.bounds = np.array([
+            [x1.min(), y1.min(), x1.max(), y1.max()] for x1, y1, _, _ in self.edges
+        ])
+        self.cell_size = cell_size
+        self.origin = self.bounds[:, :2].min(axis=0)
+        self.shape = (np.floor((self.bounds[:, 2:].max(axis=0) - self.origin) / cell_size) + 1).astype(int)
+
+        # candidates[cell, district] is True when the district's box touches the cell
+        self.candidates = np.zeros((self.shape[0] * self.shape[1], len(features)), dtype=bool)
+        first_cells = np.floor((self.bounds[:, :2] - self.origin) / cell_size).astype(int)
+        last_cells = np.floor((self.bounds[:, 2:] - self.origin) / cell_size).astype(int)
+        for district, (first, last) in enumerate(zip(first_cells, last_cells)):
+            xs, ys = np.meshgrid(np.arange(first[0], last[0] + 1), np.arange(first[1], last[1] + 1))
+            self.candidates[(xs * self.shape[1] + ys).ravel(), district] = True
+
+    def cells(self, lon, lat):
+        # Grid cell of each point, or -1 outside the grid
+        x = np.floor((lon - self.origin[0]) / self.cell_size)
+        y = np.floor((lat - self.origin[1]) / self.cell_size)
+        valid = (x >= 0) & (x < self.shape[0]) & (y >= 0) & (y < self.shape[1])
+        return np.where(valid, x * self.shape[1] + y, -1).astype(int)
+
+    def locate_codes(self, lat, lon):
+        # Index into self.names for every point, -1 where no polygon contains it
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        codes = np.full(len(lat), -1)
+        cells = self.cells(lon, lat)
+        on_grid = np.flatnonzero(cells >= 0)
+        candidates = self.candidates[cells[on_grid]]
+        for district in np.flatnonzero(candidates.any(axis=0)):
+            points = on_grid[candidates[:, district] & (codes[on_grid] < 0)]
+            min_x, min_y, max_x, max_y = self.bounds[district]
+            points = points[(lon[points] >= min_x) & (lon[points] <= max_x) & (lat[points] >= min_y) & (lat[points] <= max_y)]
+            if len(points):
+                inside = points_in_edges(lon[points], lat[points], self.edges[district])
+                codes[points[inside]] = district
+        return codes
+
+    def locate(self, lat, lon):
+        """ADM2_EN district name for each point, None outside every district.
+
+        Tickets share a few thousand site coordinates at most, so each distinct
+        coordinate pair is tested once.
+        """
+        points = np.column_stack([np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)])
+        unique_points, inverse = np.unique(points, axis=0, return_inverse=True)
+        codes = self.locate_codes(unique_points[:, 0], unique_points[:, 1])
+        names = np.append(self.names, None)
+        return names[codes][inverse.ravel()]
@@ -0,0 +1,41 @@
+import argparse
+
+import pandas as pd
+
+from district_geometry import DISTRICT_ALIASES, DistrictLocator
+
+CHUNK_SIZE = 50_000
+
+
+def join_districts(input_path, output_path, chunk_size=CHUNK_SIZE, locator=None):
+    """Add a 'Geo District' column from Latitude/Longitude to a ticket CSV.
+
+    The file is processed in chunks, so memory use does not grow with the size
+    of the export. Returns the number of tickets, the number outside every
+    district polygon and the number whose District text disagrees.
+    """
+    locator = locator or DistrictLocator()
+    total = unmatched = disagreeing = 0
+    for number, chunk in enumerate(pd.read_csv(input_path, chunksize=chunk_size)):
+        geo_district = locator.locate(chunk['Latitude'], chunk['Longitude'])
+        chunk['Geo District'] = geo_district
+
+        named = chunk['District'].map(lambda name: DISTRICT_ALIASES.get(name, name))
+        located = pd.notna(geo_district)
+        total += len(chunk)
+        unmatched += int((~located).sum())
+        disagreeing += int((located & (named.to_numpy() != geo_district)).sum())
+
+        chunk.to_csv(output_path, mode='w' if number == 0 else 'a', header=number == 0, index=False)
+    return total, unmatched, disagreeing
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Assign tickets to district polygons by coordinates")
+    parser.add_argument('input', nargs='?', default='output_updated.csv')
+    parser.add_argument('output', nargs='?', default='output_districts.csv')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    total, unmatched, disagreeing = join_districts(args.input, args.output, args.chunk_size)
+    print(f"{total} tickets, {unmatched} outside every district, {disagreeing} with a different District")
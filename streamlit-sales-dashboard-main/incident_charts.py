@@ -0,0 +1,108 @@
+from functools import lru_cache
+
+import altair as alt
+import streamlit as st
+
+# Name of the one dataset every layer of a chart template reads
+DATASET = 'counts'
+
+
+def count_labels(bars):
+    # Bold count above each bar, reading the bars' dataset
+    return bars.mark_text(
+        align='center',
+        color='blue',
+        fontWeight='bold',
+        fontSize=15,
+        baseline='bottom',
+        dy=-5
+    ).encode(
+        text='Count:Q'
+    )
+
+
+def compile_spec(chart):
+    """Vega-Lite dict of a chart template, validated by Altair once.
+
+    Compiled without Altair's default theme, as st.altair_chart does.
+    """
+    with alt.themes.enable('none'):
+        return chart.to_dict()
+
+
+@lru_cache(maxsize=None)
+def date_count_spec(title='Incident Count by Date', date_format='%Y-%m-%d', labels=True):
+    # Bars of Count per Date from a daily_counts frame
+    bars = alt.Chart(alt.NamedData(DATASET)).mark_bar().encode(
+        x=alt.X('Date:T', title='Date', axis=alt.Axis(format=date_format)),
+        y='Count:Q',
+        tooltip=['Date:T', 'Count:Q']
+    ).properties(
+        title=title
+    )
+    return compile_spec(bars + count_labels(bars) if labels else bars)
+
+
+@lru_cache(maxsize=None)
+def stacked_date_count_spec(title='Stacked Incident Count by Date', date_format='%d-%m-%y'):
+    # Bars colored by Date, labelled only where Count > 1
+    bars = alt.Chart(alt.NamedData(DATASET)).mark_bar().encode(
+        x=alt.X('Date:T', title='Date', axis=alt.Axis(format=date_format, labelOverlap=True)),
+        y='Count:Q',
+        color='Date:T',
+        tooltip=['Date:T', 'Count:Q']
+    ).properties(
+        title=title
+    )
+    text = alt.Chart(alt.NamedData(DATASET)).mark_text(
+        align='center',
+        baseline='top',
+        dy=-5,
+        color='black'
+    ).encode(
+        x='Date:T',
+        y='Count:Q',
+        text='Count:Q'
+    ).transform_filter(
+        alt.datum.Count > 1
+    )
+    return compile_spec(bars + text)
+
+
+@lru_cache(maxsize=None)
+def weekday_count_spec(title='Incident Count by Day of the Week', labels=True):
+    # Bars of Count per Day from a weekday_counts frame
+    bars = alt.Chart(alt.NamedData(DATASET)).mark_bar().encode(
+        x='Day:O',
+        y='Count:Q',
+        tooltip=['Day:N', 'Count:Q']
+    ).properties(
+        title=title
+    )
+    return compile_spec(bars + count_labels(bars) if labels else bars)
+
+
+@lru_cache(maxsize=None)
+def concurrency_spec():
+    # Step line of the peak Open Outages per bucket from a peak_per_bucket frame
+    line = alt.Chart(alt.NamedData(DATASET)).mark_line(interpolate='step-after').encode(
+        x=alt.X('Time:T', title='Time'),
+        y=alt.Y('Open Outages:Q', title='Peak Open Outages'),
+        tooltip=['Time:T', 'Open Outages:Q']
+    ).properties(
+        title='Concurrent Outages'
+    )
+    return compile_spec(line)
+
+
+def show_chart(spec, data, title=None, container=st):
+    """Render a compiled chart template with new data values.
+
+    Only the data (and optionally the title) changes between reruns: the
+    spec is reused as is, and the frame is sent once as the named dataset
+    all layers share.
+    """
+    spec = {**spec, 'datasets': {DATASET: data}}
+    if title is not None:
+        spec['title'] = title
+    container.vega_lite_chart(spec=spec, use_container_width=True)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from incident_store import concat_incidents
+from incident_time import day_bounds, event_days
+
+# Dimensions of one cube cell, besides its day
+CUBE_DIMENSIONS = ['Region', 'District', 'Client', 'Problem Category']
+
+# Day ordinal 0 (1970-01-01) was a Thursday
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def aggregate_cells(cells):
+    # Collapse rows with the same dimensions and day into one cell
+    cells = cells.groupby(CUBE_DIMENSIONS + ['Event Day'], observed=True, dropna=False, sort=False).agg(
+        Count=('Count', 'sum'), Duration=('Duration', 'sum')
+    ).reset_index()
+    return cells.sort_values('Event Day', kind='stable', ignore_index=True)
+
+
+def incident_cells(df):
+    # One cell per ticket, before aggregation
+    return pd.DataFrame({
+        **{column: df[column] for column in CUBE_DIMENSIONS},
+        'Event Day': event_days(df['Event Time'].values),
+        'Count': np.ones(len(df), dtype=np.int64),
+        'Duration': df['Duration'].astype('float64'),
+    }).reset_index(drop=True)
+
+
+class IncidentCube:
+    """Ticket count and summed Duration per Region x District x Client x
+    Problem Category x day.
+
+    The cells are sorted by day, so a sidebar filter is a binary search on
+    the day axis plus a mask over the few cells in that range; no ticket
+    rows are scanned to answer a KPI or a chart.
+    """
+
+    def __init__(self, df, cells=None):
+        self.cells = cells if cells is not None else aggregate_cells(incident_cells(df))
+        self.days = self.cells['Event Day'].to_numpy()
+
+    def appended(self, df):
+        # A new cube with the tickets in df added; only cells are re-aggregated
+        if len(df) == 0:
+            return self
+        cells = concat_incidents([self.cells, incident_cells(df)])
+        return IncidentCube(None, aggregate_cells(cells))
+
+    def __len__(self):
+        return len(self.cells)
+
+    def slice(self, region='Overall', district='Overall', clients=None, date_range=None):
+        """Cells matching the sidebar filters.
+
+        date_range is the inclusive (first day, last day) pair from
+        st.date_input, as in IncidentIndex.select.
+        """
+        start, end = day_bounds(date_range)
+        lo = 0 if start is None else int(np.searchsorted(self.days, event_days([start])[0], 'left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.days, event_days([end])[0], 'left'))
+        cells = self.cells.iloc[lo:max(lo, hi)]
+
+        mask = np.ones(len(cells), dtype=bool)
+        if region != 'Overall':
+            mask &= (cells['Region'] == region).to_numpy()
+        if district != 'Overall':
+            mask &= (cells['District'] == district).to_numpy()
+        if clients:
+            mask &= cells['Client'].isin(clients).to_numpy()
+        return cells[mask]
+
+    def total(self, *filters, **named_filters):
+        # Number of tickets matching the filters
+        return int(self.slice(*filters, **named_filters)['Count'].sum())
+
+    def daily_counts(self, *filters, **named_filters):
+        """Date/Count frame like incident_time.daily_counts, from the cells."""
+        cells = self.slice(*filters, **named_filters)
+        days, inverse = np.unique(cells['Event Day'].to_numpy(), return_inverse=True)
+        counts = np.bincount(inverse, weights=cells['Count'].to_numpy(), minlength=len(days)).astype(np.int64)
+        dates = days.astype('datetime64[D]').astype('datetime64[ns]')
+        return pd.DataFrame({'Date': dates, 'Count': counts})
+
+    def weekday_counts(self, *filters, **named_filters):
+        """Day/Count frame, most frequent day first, like
+        dt.day_name().value_counts().reset_index()."""
+        cells = self.slice(*filters, **named_filters)
+        weekdays = (cells['Event Day'].to_numpy() + 3) % 7
+        counts = np.bincount(weekdays, weights=cells['Count'].to_numpy(), minlength=7).astype(np.int64)
+        order = np.argsort(-counts, kind='stable')
+        order = order[counts[order] > 0]
+        return pd.DataFrame({'Day': np.array(WEEKDAYS)[order], 'Count': counts[order]})
@@ -0,0 +1,131 @@
+import os
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from incident_cube import IncidentCube
+from incident_hierarchy import DimensionHierarchy
+from incident_index import IncidentIndex
+from incident_search import TicketSearch
+from incident_store import DASHBOARD_COLUMNS, ensure_store, read_parts, type_incidents
+from store_manifest import read_manifest
+
+# Define the custom order for regions
+CUSTOM_REGION_ORDER = ['RIO-1', 'RIO-2', 'RIO-3', 'RIO-4']
+
+
+def region_sort_key(region):
+    return CUSTOM_REGION_ORDER.index(region) if region in CUSTOM_REGION_ORDER else float('inf')
+
+
+class IncidentData:
+    """Incident index, aggregate cube and the dimension hierarchy the
+    sidebars are built from.
+
+    The index serves the rows for maps and tables; KPIs and charts are
+    summed from the cube. The Region -> District -> Client -> Problem
+    Category hierarchy comes from the cube's cells, so the full frame is
+    scanned once per load and new tickets only add their own cells and
+    counts. search is the store's Remarks/Task Comments index, if it was
+    loaded; store_path and parts are the store and manifest parts the rows
+    were read from, for loading their text columns.
+    """
+
+    def __init__(self, df, version=None, index=None, cube=None, search=None, store_path=None, parts=None,
+                 hierarchy=None):
+        self.version = version
+        self.search = search
+        self.store_path = store_path
+        self.parts = parts
+        self.index = index if index is not None else IncidentIndex(df)
+        self.data = self.index.data
+        self.cube = cube if cube is not None else IncidentCube(self.data)
+        self.hierarchy = hierarchy if hierarchy is not None else DimensionHierarchy(self.cube.cells)
+        self.sorted_regions = sorted(self.hierarchy.options('Region'), key=region_sort_key)
+
+    def appended(self, df, version, search=None, parts=None):
+        # New IncidentData with df added; this one stays valid for other sessions
+        return IncidentData(
+            None, version, index=self.index.appended(df), cube=self.cube.appended(df), search=search or self.search,
+            store_path=self.store_path, parts=parts or self.parts, hierarchy=self.hierarchy.appended(df)
+        )
+
+    def districts_in_region(self, region):
+        return self.hierarchy.options('District', region)
+
+    def clients_in_district(self, district, region='Overall'):
+        return self.hierarchy.options('Client', region, district)
+
+    def option_counts(self, level, *scope):
+        # format_func for a sidebar widget of level, showing each option's ticket count
+        return self.hierarchy.formatter(level, *scope)
+
+
+class IncidentDataCache:
+    # Latest IncidentData of one store, shared by all sessions of the server
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.incidents = None
+        self.store_id = None
+        self.parts = []
+
+    def refresh(self, store_path):
+        """Bring the cached data up to date with the store's manifest.
+
+        A rebuilt store is loaded from scratch; parts appended since the last
+        refresh are read on their own and added incrementally.
+        """
+        manifest = read_manifest(store_path)
+        version = (manifest['store_id'], manifest['version'])
+        with self.lock:
+            if self.incidents is not None and self.incidents.version == version:
+                return self.incidents
+            if self.store_id != manifest['store_id']:
+                df = read_parts(store_path, manifest['parts'])
+                search = TicketSearch().appended(store_path, manifest['parts'])
+                self.incidents = IncidentData(
+                    df, version, search=search, store_path=store_path, parts=manifest['parts']
+                )
+            else:
+                new_parts = manifest['parts'][len(self.parts):]
+                first_row = sum(part['rows'] for part in self.parts)
+                df = read_parts(store_path, new_parts, first_row=first_row)
+                search = self.incidents.search.appended(store_path, new_parts, first_row)
+                self.incidents = self.incidents.appended(df, version, search, manifest['parts'])
+            self.store_id = manifest['store_id']
+            self.parts = manifest['parts']
+            return self.incidents
+
+
+@st.cache_resource
+def get_incident_data_cache(store_path):
+    return IncidentDataCache()
+
+
+def load_incident_data(csv_path='output_updated.csv'):
+    """Incident data for a ticket CSV, kept current with the incident store.
+
+    Each rerun only reads the store's small manifest; the cache is keyed on
+    the store path, so Streamlit never hashes a DataFrame. Tickets appended
+    with ingest_incidents.py are picked up on the next rerun.
+    """
+    store_path = ensure_store(csv_path)
+    return get_incident_data_cache(store_path).refresh(store_path)
+
+
+@st.cache_resource(max_entries=4)
+def read_export(csv_path, csv_mtime):
+    # Parsed and indexed once per path and modification time of the export
+    df = type_incidents(pd.read_csv(csv_path, usecols=DASHBOARD_COLUMNS))
+    return IncidentData(df, version=csv_mtime)
+
+
+def load_export_data(csv_path='output.csv'):
+    """Incident data read straight from a ticket export CSV, not the store.
+
+    For the pages that show the raw export. Each rerun only stats the file;
+    the CSV is read and its index, cube and hierarchy are built again only
+    when its mtime changes.
+    """
+    return read_export(csv_path, os.path.getmtime(csv_path))
@@ -0,0 +1,111 @@
+import itertools
+from collections import Counter
+
+import pandas as pd
+
+# Sidebar dimensions, each scoped by the ones before it
+HIERARCHY = ['Region', 'District', 'Client', 'Problem Category']
+
+
+def scope_choices(value):
+    # The parent values a scope entry stands for; None means all of them
+    if value is None or value == 'Overall':
+        return [None]
+    if isinstance(value, (list, tuple)):
+        return list(value) or [None]
+    return [value]
+
+
+def ranked(counts):
+    # {value: count}, most frequent first, ties by value, so any build order gives the same options
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], str(item[0]))))
+
+
+class DimensionHierarchy:
+    """Ticket counts of each Region -> District -> Client -> Problem Category
+    level, per choice of the levels above it.
+
+    Built once per load from the cube cells: for every level, the counts
+    are grouped by each subset of its parent levels (a parent left out is
+    'Overall'), so the options of a dependent widget and the count shown
+    next to each option are dictionary lookups. New tickets are added with
+    appended(), which only touches the scopes they fall in.
+    """
+
+    def __init__(self, cells):
+        counts = cells.groupby(HIERARCHY, observed=True, dropna=False)['Count'].sum()
+        counts = counts[counts > 0]
+        self.levels = {}
+        for depth, level in enumerate(HIERARCHY):
+            parents = HIERARCHY[:depth]
+            scopes = self.levels[level] = {}
+            for chosen in itertools.product([False, True], repeat=depth):
+                by = [parent for parent, keep in zip(parents, chosen) if keep]
+                grouped = counts.groupby(level=by + [level], observed=True).sum()
+                for key, count in grouped.items():
+                    key = key if isinstance(key, tuple) else (key,)
+                    values = iter(key[:-1])
+                    scope = tuple(next(values) if keep else None for keep in chosen)
+                    scopes.setdefault(scope, {})[key[-1]] = int(count)
+            for scope, values in scopes.items():
+                scopes[scope] = ranked(values)
+
+    def appended(self, df):
+        """A new hierarchy with the tickets of df added; this one is unchanged.
+
+        The new tickets are grouped once, and their counts are added to
+        copies of the scopes they fall in; every other scope is shared.
+        """
+        added = df.groupby(HIERARCHY, observed=True, dropna=False).size()
+        hierarchy = DimensionHierarchy.__new__(DimensionHierarchy)
+        hierarchy.levels = {level: dict(scopes) for level, scopes in self.levels.items()}
+        changed = {level: {} for level in HIERARCHY}
+        for key, count in added.items():
+            missing = [pd.isna(value) for value in key]
+            for depth, level in enumerate(HIERARCHY):
+                if missing[depth]:
+                    continue
+                for chosen in itertools.product([False, True], repeat=depth):
+                    # Grouping by level in __init__ drops missing values, at the level and in the scope
+                    if any(keep and gap for keep, gap in zip(chosen, missing)):
+                        continue
+                    scope = tuple(value if keep else None for value, keep in zip(key, chosen))
+                    if scope not in changed[level]:
+                        changed[level][scope] = Counter(hierarchy.levels[level].get(scope, {}))
+                    changed[level][scope][key[depth]] += int(count)
+        for level, scopes in changed.items():
+            for scope, counts in scopes.items():
+                hierarchy.levels[level][scope] = ranked(counts)
+        return hierarchy
+
+    def counts(self, level, *scope):
+        """{value: ticket count} of level under the chosen parent values,
+        most frequent first.
+
+        scope gives the parents in hierarchy order; 'Overall', None or an
+        empty list leaves one unfiltered, and a list (a multiselect) sums
+        the counts of its values.
+        """
+        depth = HIERARCHY.index(level)
+        scope = (list(scope) + [None] * depth)[:depth]
+        scopes = self.levels[level]
+        keys = list(itertools.product(*(scope_choices(value) for value in scope)))
+        if len(keys) == 1:
+            return scopes.get(keys[0], {})
+        total = Counter()
+        for key in keys:
+            total.update(scopes.get(key, {}))
+        return ranked(total)
+
+    def options(self, level, *scope):
+        return list(self.counts(level, *scope))
+
+    def formatter(self, level, *scope):
+        # format_func showing each option's count; 'Overall' shows the scope's total
+        counts = self.counts(level, *scope)
+        total = sum(counts.values())
+
+        def format_option(value):
+            count = total if value == 'Overall' else counts.get(value, 0)
+            return f'{value} ({count:,})'
+        return format_option
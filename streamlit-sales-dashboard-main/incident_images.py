@@ -0,0 +1,52 @@
+import io
+import threading
+
+import matplotlib
+import numpy as np
+from matplotlib.figure import Figure
+
+# Above this many bars the per-bar count labels would overlap, so they are left
+# out, and the bars are drawn as one line collection instead of one patch each
+MAX_BAR_LABELS = 60
+
+
+class DateBarImage:
+    """Static PNG bar chart of a daily_counts frame.
+
+    Draws the already-aggregated counts with one bar call on a Figure/Axes
+    created once (without pyplot, so no global figure state), and renders
+    it into a PNG buffer. The lock keeps sessions from drawing on the shared
+    Axes at the same time.
+    """
+
+    def __init__(self, figsize=(12, 6), dpi=100):
+        self.figure = Figure(figsize=figsize, dpi=dpi, layout='tight')
+        self.axes = self.figure.subplots()
+        self.lock = threading.Lock()
+
+    def draw(self, date_count, title):
+        ax = self.axes
+        ax.clear()
+        dates, counts = date_count['Date'].to_numpy(), date_count['Count'].to_numpy()
+        colors = matplotlib.colormaps['viridis'](np.linspace(0, 1, max(len(counts), 1)))
+        if len(counts) <= MAX_BAR_LABELS:
+            bars = ax.bar(dates, counts, width=0.8, color=colors[:len(counts)], zorder=2)
+            ax.bar_label(bars, color='black', fontsize=9, fontweight='bold')
+        else:
+            # 80% of the width in points each day gets over the span, at least a hairline
+            days = max(int((dates.max() - dates.min()) / np.timedelta64(1, 'D')) + 1, 1)
+            width = self.figure.get_figwidth() * 72 * 0.8 / days
+            ax.vlines(dates, 0, counts, colors=colors[:len(counts)], linewidth=max(width, 0.5), zorder=2)
+        ax.set(xlabel='Date', ylabel='Count', title=title)
+        ax.set_ylim(bottom=0)
+        ax.grid(axis='y', color='#dddddd', zorder=0)
+        ax.spines[['top', 'right']].set_visible(False)
+        self.figure.autofmt_xdate(rotation=45, ha='right')
+
+    def png(self, date_count, title='Incident Count by Date'):
+        # PNG bytes of the chart for these counts
+        buffer = io.BytesIO()
+        with self.lock:
+            self.draw(date_count, title)
+            self.figure.savefig(buffer, format='png')
+        return buffer.getvalue()
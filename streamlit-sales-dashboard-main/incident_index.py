@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+from incident_store import concat_incidents
+from incident_time import day_bounds, event_days
+
+# Dimensions that get one bitmap per distinct value
+INDEX_COLUMNS = ['Region', 'District', 'Client']
+
+
+def build_bitmaps(values):
+    # Map every distinct value to a packed bitmap of the rows holding it
+    codes, uniques = pd.factorize(values)
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    # Rows with a missing value (code -1) sort first and are skipped
+    start = int((codes < 0).sum())
+    bitmaps = {}
+    for code, value in enumerate(uniques):
+        end = start + int(counts[code])
+        bits = np.zeros(len(codes), dtype=bool)
+        bits[order[start:end]] = True
+        bitmaps[value] = np.packbits(bits)
+        start = end
+    return bitmaps
+
+
+def splice_bitmaps(bitmaps, first_byte, tail_values):
+    # Bitmaps keeping their bytes before first_byte, rebuilt from tail_values (the rows from first_byte * 8 on)
+    tail = build_bitmaps(tail_values)
+    empty_tail = np.packbits(np.zeros(len(tail_values), dtype=bool))
+    empty_head = np.zeros(first_byte, dtype=np.uint8)
+    result = {}
+    for value in list(bitmaps) + [value for value in tail if value not in bitmaps]:
+        head = bitmaps[value][:first_byte] if value in bitmaps else empty_head
+        result[value] = np.concatenate([head, tail.get(value, empty_tail)])
+    return result
+
+
+class IncidentIndex:
+    """Incident frame sorted by Event Time with per-value row bitmaps.
+
+    select() resolves a combined sidebar filter to row positions by binary
+    searching the time axis and intersecting the dimension bitmaps over that
+    slice only, then takes the matching rows in one step.
+    """
+
+    def __init__(self, df, columns=INDEX_COLUMNS):
+        order = np.argsort(df['Event Time'].values, kind='stable')
+        self.times = df['Event Time'].values[order]
+        # Day ordinal per row, so charts never convert rows to datetime.date
+        self.data = df.iloc[order].assign(**{'Event Day': event_days(self.times)})
+        self.bitmaps = {column: build_bitmaps(self.data[column]) for column in columns}
+
+    def appended(self, df):
+        """A new index over these incidents and the ones in df.
+
+        The new tickets are merged in at their binary-searched places in
+        Event Time order, after existing tickets with the same time, as a
+        full rebuild would order them. Rows before the first insert keep
+        their place, so the bitmaps keep their bytes up to it and are
+        rebuilt only from there on. Tickets are exported once cleared, so
+        they land near the end and little is rebuilt. This index is left
+        unchanged for readers that still hold it.
+        """
+        if len(df) == 0:
+            return self
+        order = np.argsort(df['Event Time'].values, kind='stable')
+        new_times = df['Event Time'].values[order]
+        inserts = np.searchsorted(self.times, new_times, 'right')
+
+        # Row of each new ticket in the merged index; existing rows fill the rest in order
+        size = len(self) + len(df)
+        new_rows = inserts + np.arange(len(df))
+        is_new = np.zeros(size, dtype=bool)
+        is_new[new_rows] = True
+        take = np.empty(size, dtype=np.int64)
+        take[new_rows] = len(self) + np.arange(len(df))
+        take[~is_new] = np.arange(len(self))
+
+        index = IncidentIndex.__new__(IncidentIndex)
+        index.times = np.concatenate([self.times, new_times])[take]
+        added = df.iloc[order].assign(**{'Event Day': event_days(new_times)})
+        index.data = concat_incidents([self.data, added]).iloc[take]
+        first_byte = int(inserts[0]) // 8
+        index.bitmaps = {
+            column: splice_bitmaps(bitmaps, first_byte, index.data[column].iloc[first_byte * 8:])
+            for column, bitmaps in self.bitmaps.items()
+        }
+        return index
+
+    def __len__(self):
+        return len(self.data)
+
+    def time_slice(self, start=None, end=None):
+        # Row range [lo, hi) with start <= Event Time < end
+        lo = 0 if start is None else int(np.searchsorted(self.times, np.datetime64(start), 'left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.times, np.datetime64(end), 'left'))
+        return lo, max(lo, hi)
+
+    def dimension_bits(self, column, values, first_byte, last_byte):
+        # Union of the bitmaps for the selected values, restricted to a byte range
+        bits = np.zeros(last_byte - first_byte, dtype=np.uint8)
+        for value in values:
+            bitmap = self.bitmaps[column].get(value)
+            if bitmap is not None:
+                bits |= bitmap[first_byte:last_byte]
+        return bits
+
+    def positions(self, region='Overall', district='Overall', clients=None, start=None, end=None):
+        lo, hi = self.time_slice(start, end)
+        selections = []
+        if region != 'Overall':
+            selections.append(('Region', [region]))
+        if district != 'Overall':
+            selections.append(('District', [district]))
+        if clients:
+            selections.append(('Client', clients))
+        if not selections:
+            return np.arange(lo, hi)
+
+        first_byte, last_byte = lo // 8, (hi + 7) // 8
+        bits = None
+        for column, values in selections:
+            column_bits = self.dimension_bits(column, values, first_byte, last_byte)
+            bits = column_bits if bits is None else bits & column_bits
+        positions = first_byte * 8 + np.flatnonzero(np.unpackbits(bits))
+        return positions[(positions >= lo) & (positions < hi)]
+
+    def take(self, positions):
+        return self.data.iloc[positions]
+
+    def select(self, region='Overall', district='Overall', clients=None, date_range=None):
+        """Return the incidents matching the sidebar filters.
+
+        date_range is the (start, end) pair from st.date_input; both days are
+        inclusive.
+        """
+        start, end = day_bounds(date_range)
+        return self.take(self.positions(region, district, clients, start, end))
@@ -0,0 +1,135 @@
+import json
+
+import numpy as np
+import streamlit as st
+from branca.colormap import LinearColormap
+from folium.features import GeoJson, GeoJsonTooltip
+from folium.plugins import FastMarkerCluster
+
+from district_geometry import DISTRICT_ALIASES, district_layer
+from result_cache import disk_cached
+
+# Heat map cell size in degrees (about 2 km); the number of heat points is
+# bounded by the number of occupied cells instead of the number of tickets
+HEAT_CELL_SIZE = 0.02
+
+# Builds one Leaflet marker per data row in the browser. Client names are sent
+# once and each row only carries the client's code.
+MARKER_CALLBACK = """(function () {
+    var clients = %s;
+    return function (row) {
+        var marker = L.marker(new L.LatLng(row[0], row[1]));
+        var eventTime = new Date(row[3] * 1000).toISOString().slice(0, 19).replace('T', ' ');
+        marker.bindPopup(
+            'Ticket ID: ' + row[2] + '<br>Event Time: ' + eventTime + '<br>Client: ' + clients[row[4]]
+        );
+        return marker;
+    };
+})()"""
+
+
+def marker_rows(data):
+    """Compact [lat, lon, ticket id, event time, client code] rows.
+
+    Built column-wise from the NumPy arrays; event times are epoch seconds
+    and coordinates are rounded to about a metre to keep the payload small.
+    """
+    client_codes, clients = data['Client'].factorize()
+    columns = [
+        np.round(data['Latitude'].to_numpy(dtype=float), 5).tolist(),
+        np.round(data['Longitude'].to_numpy(dtype=float), 5).tolist(),
+        data['Ticket ID'].tolist(),
+        (data['Event Time'].to_numpy(dtype='datetime64[s]').astype(np.int64)).tolist(),
+        client_codes.tolist(),
+    ]
+    return [list(row) for row in zip(*columns)], [str(client) for client in clients]
+
+
+def add_incident_markers(m, data, name='Incidents'):
+    # A single clustered layer instead of one folium.Marker per incident
+    rows, clients = marker_rows(data)
+    callback = MARKER_CALLBACK % json.dumps(clients)
+    return FastMarkerCluster(rows, callback=callback, name=name).add_to(m)
+
+
+def heat_grid(data, cell_size=HEAT_CELL_SIZE):
+    """Bin incidents into a lat/lon grid for folium's HeatMap.
+
+    Returns [lat, lon, count] for every non-empty cell, located at the cell
+    centre. Cell edges are aligned to multiples of cell_size so that the grid
+    is the same for every filter selection.
+    """
+    lat = data['Latitude'].to_numpy(dtype=float)
+    lon = data['Longitude'].to_numpy(dtype=float)
+    keep = ~(np.isnan(lat) | np.isnan(lon))
+    lat, lon = lat[keep], lon[keep]
+    if len(lat) == 0:
+        return []
+    lat_edges = grid_edges(lat, cell_size)
+    lon_edges = grid_edges(lon, cell_size)
+    counts, _, _ = np.histogram2d(lat, lon, bins=[lat_edges, lon_edges])
+    rows, cols = np.nonzero(counts)
+    centres_lat = np.round(lat_edges[rows] + cell_size / 2, 5)
+    centres_lon = np.round(lon_edges[cols] + cell_size / 2, 5)
+    return [list(cell) for cell in zip(centres_lat.tolist(), centres_lon.tolist(), counts[rows, cols].astype(int).tolist())]
+
+
+@st.cache_data(max_entries=64)
+@disk_cached
+def heat_data(filter_state, _data):
+    """Heat grid of _data, cached in memory and in the shared disk cache.
+
+    filter_state identifies _data, which is not hashed: it starts with the
+    page's name, followed by the data version and the filter selection.
+    """
+    return heat_grid(_data)
+
+
+def grid_edges(values, cell_size):
+    first = np.floor(values.min() / cell_size)
+    last = np.floor(values.max() / cell_size) + 1
+    return np.arange(first, last + 1) * cell_size
+
+
+def district_incident_counts(data):
+    # Incidents per boundary district (ADM2_EN), from a groupby over the tickets
+    counts = data['District'].value_counts()
+    counts = counts[counts > 0]
+    counts.index = [DISTRICT_ALIASES.get(name, name) for name in counts.index.astype(str)]
+    return counts.groupby(level=0).sum()
+
+
+def add_district_choropleth(m, data, zoom=6, geo_json_path='bd_jeoson.json', style=None, name='Incidents per district'):
+    """Color each district of the cached boundary layer by its incident count.
+
+    The features are shallow copies that share the cached geometry, with the
+    count added to their properties for the tooltip.
+    """
+    counts = district_incident_counts(data)
+    colormap = LinearColormap(
+        ['#ffffb2', '#fd8d3c', '#bd0026'],
+        vmin=0,
+        vmax=max(int(counts.max()) if len(counts) else 0, 1),
+        caption='Incidents per district',
+    )
+    layer = district_layer(zoom, geo_json_path)
+    features = []
+    for feature in layer['features']:
+        count = int(counts.get(feature['properties']['ADM2_EN'], 0))
+        features.append(dict(feature, properties=dict(feature['properties'], Incidents=count)))
+
+    base_style = {'color': 'black', 'weight': 1, 'fillOpacity': 0.6}
+    base_style.update(style or {})
+
+    def style_function(feature):
+        count = feature['properties']['Incidents']
+        return dict(base_style, fillColor=colormap(count) if count else 'transparent')
+
+    GeoJson(
+        {'type': 'FeatureCollection', 'features': features},
+        name=name,
+        style_function=style_function,
+        tooltip=GeoJsonTooltip(fields=['ADM2_EN', 'Incidents'], aliases=['District', 'Incidents']),
+    ).add_to(m)
+    colormap.add_to(m)
+    return counts
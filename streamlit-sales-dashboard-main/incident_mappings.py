@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+# Define a mapping for region replacements
+REGION_MAPPING = {
+    'Regional Implementation & Operations 1': 'RIO-1',
+    'Regional Implementation & Operations 2': 'RIO-2',
+    'Regional Implementation & Operations 3': 'RIO-3',
+    'Regional Implementation & Operations 4': 'RIO-4'
+    # Add more mappings if needed
+}
+
+# Spelling variants of district and client names in the export, mapped to
+# the spelling the dashboards use. Add entries here or in a mapping file.
+DISTRICT_MAPPING = {}
+CLIENT_MAPPING = {}
+
+# Column -> {export value: normalized value}
+DEFAULT_MAPPINGS = {
+    'Region': REGION_MAPPING,
+    'District': DISTRICT_MAPPING,
+    'Client': CLIENT_MAPPING,
+}
+
+
+def load_mappings(mapping_path=None):
+    """The default mappings, extended by a JSON file of the same shape.
+
+    The file holds {"Column": {"export value": "normalized value"}}; its
+    entries override the defaults and may add more columns.
+    """
+    mappings = {column: dict(mapping) for column, mapping in DEFAULT_MAPPINGS.items()}
+    if mapping_path:
+        with open(mapping_path, 'r') as f:
+            for column, mapping in json.load(f).items():
+                mappings.setdefault(column, {}).update(mapping)
+    return mappings
+
+
+def remap_categorical(values, mapping):
+    """Apply mapping to a column by remapping its categorical codes.
+
+    Only the distinct values are looked up in mapping; every row is then
+    moved to its new code with one NumPy take.
+    """
+    values = values.astype('category')
+    targets = pd.Index([mapping.get(value, value) for value in values.cat.categories])
+    categories = targets.unique()
+    lookup = np.append(categories.get_indexer(targets), -1)
+    # Code -1 (missing) picks the -1 appended to the lookup table
+    codes = lookup[values.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=values.index, name=values.name)
+
+
+def normalize_incidents(df, mappings=None):
+    # Apply the mappings to every mapped column present in df
+    mappings = DEFAULT_MAPPINGS if mappings is None else mappings
+    for column, mapping in mappings.items():
+        if column in df and mapping:
+            df[column] = remap_categorical(df[column], mapping)
+    return df
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+# Restoration target; outages longer than this count as SLA breaches
+SLA_HOURS = 4
+
+PERCENTILES = [50, 90, 99]
+
+SUMMARY_COLUMNS = ['Incidents', 'MTTR'] + [f'p{q}' for q in PERCENTILES] + ['SLA Breaches']
+
+# Bucket widths for a charted concurrency curve, narrowest first, and the
+# most buckets a chart may have; the first width that fits is used
+CURVE_BUCKETS = {'hour': np.timedelta64(1, 'h'), 'day': np.timedelta64(1, 'D'), 'week': np.timedelta64(7, 'D')}
+MAX_CURVE_POINTS = 2000
+
+
+def outage_hours(data):
+    # Clear Time - Event Time in hours, falling back to Duration for uncleared tickets
+    hours = (data['Clear Time'].values - data['Event Time'].values) / np.timedelta64(1, 'h')
+    if 'Duration' in data:
+        hours = np.where(np.isnan(hours), data['Duration'].to_numpy(dtype='float64'), hours)
+    return hours
+
+
+def duration_summary(data, sla_hours=SLA_HOURS):
+    """Incidents, MTTR, p50/p90/p99 and SLA breaches of the given tickets.
+
+    Durations are in hours; tickets without a duration are counted as
+    incidents but left out of the other figures.
+    """
+    hours = outage_hours(data)
+    hours = hours[~np.isnan(hours)]
+    summary = {'Incidents': len(data), 'MTTR': hours.mean() if len(hours) else np.nan}
+    quantiles = np.percentile(hours, PERCENTILES) if len(hours) else [np.nan] * len(PERCENTILES)
+    summary.update({f'p{q}': value for q, value in zip(PERCENTILES, quantiles)})
+    summary['SLA Breaches'] = int((hours > sla_hours).sum())
+    return summary
+
+
+def duration_table(data, by='Region', sla_hours=SLA_HOURS):
+    """duration_summary per value of by, largest MTTR first.
+
+    Each figure is one grouped, vectorized aggregation over the column of
+    durations; no group is summarized in a Python loop.
+    """
+    if len(data) == 0:
+        return pd.DataFrame(columns=[by] + SUMMARY_COLUMNS)
+    hours = pd.Series(outage_hours(data), index=data.index)
+    grouped = hours.groupby(data[by].to_numpy())
+    table = pd.DataFrame({'Incidents': grouped.size(), 'MTTR': grouped.mean()})
+    for q in PERCENTILES:
+        table[f'p{q}'] = grouped.quantile(q / 100)
+    table['SLA Breaches'] = (hours > sla_hours).groupby(data[by].to_numpy()).sum().astype(int)
+    table = table.sort_values('MTTR', ascending=False, kind='stable')
+    return table.rename_axis(by).reset_index()
+
+
+def concurrency_curve(data):
+    """Number of open outages after every start or clear event.
+
+    A sweep over the start and clear times sorted together: each start adds
+    one open outage, each clear removes one, and the running sum is the
+    curve. At equal times clears go first, so back-to-back outages do not
+    overlap. Tickets without a Clear Time stay open.
+    """
+    starts = data['Event Time'].values
+    ends = data['Clear Time'].values
+    ends = ends[~np.isnat(ends)]
+    times = np.concatenate([starts, ends])
+    steps = np.concatenate([np.ones(len(starts), dtype=np.int64), -np.ones(len(ends), dtype=np.int64)])
+    # Sort by time, then -1 before +1
+    order = np.lexsort((steps, times))
+    times, open_outages = times[order], np.cumsum(steps[order])
+    # Keep the level after the last event at each time
+    last = np.append(times[1:] != times[:-1], True) if len(times) else np.zeros(0, dtype=bool)
+    return pd.DataFrame({'Time': times[last], 'Open Outages': open_outages[last]})
+
+
+def peak_concurrency(curve):
+    # (time, open outages) at the highest point of a concurrency curve
+    if len(curve) == 0:
+        return None, 0
+    peak = int(curve['Open Outages'].to_numpy().argmax())
+    return curve['Time'].iloc[peak], int(curve['Open Outages'].iloc[peak])
+
+
+def bucket_width(curve, max_points=MAX_CURVE_POINTS):
+    # Name of the narrowest bucket that keeps the curve within max_points buckets
+    if len(curve) == 0:
+        return next(iter(CURVE_BUCKETS))
+    span = curve['Time'].iloc[-1] - curve['Time'].iloc[0]
+    for name, width in CURVE_BUCKETS.items():
+        if span // width < max_points:
+            return name
+    return name
+
+
+def peak_per_bucket(curve, bucket=None):
+    """Highest number of open outages in each fixed time bucket of a
+    concurrency_curve, for charting and caching.
+
+    The event-level curve has a point per start or clear; this one has a
+    point per bucket (an hour, day or week, see bucket_width), at the
+    bucket's start, whatever the number of tickets. A bucket's peak counts
+    the outages still open when it begins. Returns the frame and the
+    bucket's name.
+    """
+    bucket = bucket or bucket_width(curve)
+    if len(curve) == 0:
+        return pd.DataFrame({'Time': pd.Series(dtype='datetime64[ns]'), 'Open Outages': pd.Series(dtype='int64')}), bucket
+    width = CURVE_BUCKETS[bucket].astype('timedelta64[ns]').astype(np.int64)
+    times = curve['Time'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    levels = curve['Open Outages'].to_numpy()
+    numbers = times // width
+    first = numbers[0]
+    size = int(numbers[-1] - first) + 1
+
+    # Buckets holding events, their highest level and the level after their last event
+    occupied, starts = np.unique(numbers - first, return_index=True)
+    highest = np.maximum.reduceat(levels, starts)
+    last = levels[np.append(starts[1:], len(levels)) - 1]
+
+    # Level at the start of each bucket: after the last event of an earlier bucket
+    latest = np.full(size, -1)
+    latest[occupied] = np.arange(len(occupied))
+    latest = np.maximum.accumulate(latest)
+    before = np.concatenate([[-1], latest[:-1]])
+    peaks = np.where(before >= 0, last[before], 0)
+    # Unless an event falls on the bucket's first instant, its opening level counts too
+    opening = np.where(times[starts] % width == 0, 0, peaks[occupied])
+    peaks[occupied] = np.maximum(highest, opening)
+    bucket_starts = ((first + np.arange(size)) * width).astype('datetime64[ns]')
+    return pd.DataFrame({'Time': bucket_starts, 'Open Outages': peaks.astype(np.int64)}), bucket
@@ -0,0 +1,166 @@
+import os
+import re
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# Free-text columns covered by the search index, in field order
+SEARCH_COLUMNS = ['Remarks', 'Task Comments']
+
+TOKEN_PATTERN = r'\w+'
+
+# Longer tokens (hashes, URLs) are cut, in documents and queries alike
+MAX_TOKEN_LENGTH = 32
+
+# Positions of one field fit below this, so (row, field, position) packs into one int64
+MAX_POSITION = 1 << 20
+
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def segment_path_for(store_path, part_path):
+    # Each store part has its own index segment next to it
+    return os.path.join(store_path, part_path[:-len('.parquet')] + '.search.npz')
+
+
+def tokenize(text):
+    return [token[:MAX_TOKEN_LENGTH] for token in re.findall(TOKEN_PATTERN, text.lower())]
+
+
+def build_segment(df):
+    """Inverted index of the search columns of df, by row position in df.
+
+    The postings of every term are (row, field, position) triples, sorted,
+    and stored as flat arrays with one offset per term.
+    """
+    frames = [pd.DataFrame({
+        'term': np.array([], dtype=str),
+        'row': np.array([], dtype=np.int32),
+        'field': np.array([], dtype=np.int8),
+        'position': np.array([], dtype=np.int32),
+    })]
+    for field, column in enumerate(SEARCH_COLUMNS):
+        if column not in df:
+            continue
+        texts = df[column].reset_index(drop=True).astype('string').fillna('')
+        tokens = texts.str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+        frames.append(pd.DataFrame({
+            'term': tokens.str.slice(0, MAX_TOKEN_LENGTH).to_numpy(dtype=str),
+            'row': tokens.index.to_numpy(dtype=np.int32),
+            'field': np.full(len(tokens), field, dtype=np.int8),
+            'position': tokens.groupby(level=0).cumcount().to_numpy(dtype=np.int32),
+        }))
+    postings = pd.concat(frames, ignore_index=True)
+
+    terms, term_ids = np.unique(postings['term'].to_numpy(dtype=str), return_inverse=True)
+    order = np.lexsort((postings['position'], postings['field'], postings['row'], term_ids))
+    return {
+        'terms': terms,
+        'offsets': np.concatenate([[0], np.cumsum(np.bincount(term_ids, minlength=len(terms)))]).astype(np.int64),
+        'rows': postings['row'].to_numpy(dtype=np.int32)[order],
+        'fields': postings['field'].to_numpy(dtype=np.int8)[order],
+        'positions': postings['position'].to_numpy(dtype=np.int32)[order],
+    }
+
+
+def write_segment(path, df):
+    # A temporary name of its own, as several sessions may index the same part
+    segment = build_segment(df)
+    temporary = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(temporary, 'wb') as f:
+        np.savez(f, **segment)
+    os.replace(temporary, path)
+    return segment
+
+
+def read_segment(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def parse_query(query):
+    """(tokens, prefix) pairs of a query; each must match somewhere.
+
+    Quoted parts are phrases of whole words. Other words are prefixes, so
+    'fib' finds 'fiber'; a word that splits into several tokens is a phrase
+    whose last token is a prefix.
+    """
+    phrases = []
+    for phrase, word in QUERY_PATTERN.findall(query):
+        tokens = tokenize(phrase or word)
+        if tokens:
+            phrases.append((tokens, not phrase))
+    return phrases
+
+
+def postings(segment, term, prefix=False):
+    """(row, field, position) arrays of one term in a segment.
+
+    With prefix, of every term starting with term: the terms are sorted,
+    so they are one searchsorted range and their postings one slice.
+    """
+    terms = segment['terms']
+    start = int(np.searchsorted(terms, term, 'left'))
+    if prefix:
+        end = int(np.searchsorted(terms, term + '\U0010ffff', 'left'))
+    else:
+        end = start + int(start < len(terms) and terms[start] == term)
+    start, end = segment['offsets'][start], segment['offsets'][end]
+    return segment['rows'][start:end], segment['fields'][start:end], segment['positions'][start:end]
+
+
+def phrase_rows(segment, tokens, prefix=False):
+    """Rows of a segment holding tokens at consecutive positions of one field.
+
+    With prefix, the last token matches any term it starts. Each posting is
+    packed into one int64 key (row, field, position - offset in the
+    phrase); the keys of all tokens are intersected.
+    """
+    keys = None
+    for offset, token in enumerate(tokens):
+        rows, fields, positions = postings(segment, token, prefix and offset == len(tokens) - 1)
+        starts = positions.astype(np.int64) - offset
+        valid = starts >= 0
+        token_keys = (rows[valid].astype(np.int64) * len(SEARCH_COLUMNS) + fields[valid]) * MAX_POSITION + starts[valid]
+        keys = token_keys if keys is None else np.intersect1d(keys, token_keys, assume_unique=True)
+        if len(keys) == 0:
+            break
+    return np.unique(keys // (MAX_POSITION * len(SEARCH_COLUMNS)))
+
+
+class TicketSearch:
+    """Inverted index over the Remarks and Task Comments of the store.
+
+    One segment per store part is written when the part is written, so an
+    ingest indexes only its own tickets. Queries return store row
+    positions, which combine with the sidebar filter's rows.
+    """
+
+    def __init__(self, segments=None):
+        # (first store row, segment) pairs in store order
+        self.segments = segments or []
+
+    def appended(self, store_path, parts, first_row=0):
+        # A new search with the segments of parts added
+        segments = list(self.segments)
+        for part in parts:
+            segments.append((first_row, read_segment(segment_path_for(store_path, part['path']))))
+            first_row += part['rows']
+        return TicketSearch(segments)
+
+    def rows(self, query):
+        """Sorted store rows matching every word prefix and quoted phrase of query."""
+        phrases = parse_query(query)
+        if not phrases:
+            return np.zeros(0, dtype=np.int64)
+        matches = []
+        for first_row, segment in self.segments:
+            rows = None
+            for tokens, prefix in phrases:
+                found = phrase_rows(segment, tokens, prefix)
+                rows = found if rows is None else np.intersect1d(rows, found, assume_unique=True)
+                if len(rows) == 0:
+                    break
+            matches.append(rows + first_row)
+        return np.concatenate(matches) if matches else np.zeros(0, dtype=np.int64)
@@ -0,0 +1,336 @@
+import os
+import uuid
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa  # pip install pyarrow
+import pyarrow.parquet as pq
+
+from incident_search import segment_path_for, write_segment
+from store_manifest import (
+    new_build, part_path, publish_build, read_manifest, source_fingerprint, store_lock, write_manifest
+)
+
+# Columns that are small enough to load on every rerun
+CATEGORY_COLUMNS = ['Problem Category', 'Client', 'Region', 'subcenter', 'District', 'Dealy Reason', 'Reason']
+DATETIME_COLUMNS = ['Event Time', 'Clear Time']
+COORDINATE_COLUMNS = ['Latitude', 'Longitude']
+
+# Multi-line free-text columns, only loaded on demand
+TEXT_COLUMNS = ['Remarks', 'Task Comments']
+
+# Columns the ticket table reads for its visible page only. Each part keeps a
+# copy of them in a text file of small row groups, so a page decodes a few
+# rows of text while the part itself keeps large row groups
+DETAIL_COLUMNS = ['Dealy Reason'] + TEXT_COLUMNS
+
+# Columns every outage dashboard needs for filtering, mapping, the aggregate cube
+# and outage durations
+DASHBOARD_COLUMNS = [
+    'Ticket ID', 'Region', 'District', 'Client', 'Problem Category', 'Event Time', 'Clear Time', 'Duration',
+    'Latitude', 'Longitude',
+]
+
+# A ticket is identified by its Ticket ID and Fault ID together
+KEY_COLUMNS = ['Ticket ID', 'Fault ID']
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Bumped when the store layout changes, so older stores are rebuilt
+STORE_FORMAT = 1
+
+# Rows per Parquet row group of a part
+ROW_GROUP_SIZE = 64 * 1024
+
+# Rows per row group of a part's text file; a page of the ticket table
+# decodes only the groups that hold its rows
+TEXT_ROW_GROUP_SIZE = 64
+
+# Appended parts a month may have before compact_store merges them into one
+MAX_APPENDED_PARTS = 16
+
+
+def store_path_for(csv_path):
+    # The store is a directory of Parquet parts, partitioned by event month
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def text_path_for(store_path, part_path):
+    # Each part's detail columns are copied next to it
+    return os.path.join(store_path, part_path[:-len('.parquet')] + '.text.parquet')
+
+
+def type_incidents(df):
+    # Give the raw ticket columns compact, typed dtypes
+    for column in CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
+    for column in DATETIME_COLUMNS:
+        if column in df:
+            df[column] = pd.to_datetime(df[column], format=TIME_FORMAT)
+    for column in COORDINATE_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('float32')
+    return df
+
+
+def concat_incidents(frames):
+    # pd.concat turns categoricals with different categories into objects,
+    # so give every frame the union of the categories first, in label order
+    # as astype('category') gives them
+    frames = [frame for frame in frames if len(frame.columns)]
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            categories = pd.api.types.union_categoricals(
+                [frame[column].astype('category') for frame in frames], sort_categories=True, ignore_order=True
+            ).categories
+            frames = [frame.assign(**{column: frame[column].astype(pd.CategoricalDtype(categories))}) for frame in frames]
+    return pd.concat(frames)
+
+
+def unseen_tickets(df, known):
+    # Rows of df whose Ticket ID + Fault ID is not in the frame known
+    keys = pd.MultiIndex.from_frame(known[KEY_COLUMNS])
+    return df[~pd.MultiIndex.from_frame(df[KEY_COLUMNS]).isin(keys)]
+
+
+def write_parts(store_path, df, manifest, appended=False):
+    """Write df as one new part per event month and list the parts in manifest.
+
+    Rows are numbered by the order of the parts in the manifest, so existing
+    row positions never change when parts are appended. Each part gets its
+    own search index segment. appended marks parts that hold ingested
+    tickets rather than rows of the CSV, so a rebuild can carry them over.
+    """
+    schema = None
+    if manifest['parts']:
+        schema = pq.read_schema(os.path.join(store_path, manifest['parts'][0]['path']))
+        # New tickets may come with their columns in another order, or with extra ones
+        missing = [column for column in schema.names if column not in df]
+        if missing:
+            raise ValueError(f"Tickets are missing the store's columns {missing}")
+        df = df[schema.names]
+    months = df['Event Time'].values.astype('datetime64[M]')
+    for month in np.unique(months):
+        label = 'unknown' if np.isnat(month) else str(month)
+        part = df[np.isnat(months)] if np.isnat(month) else df[months == month]
+        # In time order, so a page of tickets by Event Time sits in one or two row groups
+        part = part.sort_values('Event Time', kind='stable')
+        table = pa.Table.from_pandas(part, preserve_index=False)
+        if schema is not None:
+            table = table.cast(schema)
+        relative_path = part_path(manifest, label, manifest['version'])
+        os.makedirs(os.path.join(store_path, os.path.dirname(relative_path)), exist_ok=True)
+        pq.write_table(table, os.path.join(store_path, relative_path), row_group_size=ROW_GROUP_SIZE)
+        text_columns = [column for column in DETAIL_COLUMNS if column in table.column_names]
+        # Without column statistics, which nothing filters on, the footer stays small
+        pq.write_table(
+            table.select(text_columns), text_path_for(store_path, relative_path),
+            row_group_size=TEXT_ROW_GROUP_SIZE, write_statistics=False,
+        )
+        write_segment(segment_path_for(store_path, relative_path), part)
+        manifest['parts'].append({'path': relative_path, 'rows': len(part), 'appended': appended})
+
+
+def format_manifest(store_path):
+    # The store's manifest, or None if there is no store in the current format
+    manifest = read_manifest(store_path) if os.path.isdir(store_path) else None
+    if manifest is not None and manifest.get('format') != STORE_FORMAT:
+        return None
+    return manifest
+
+
+def appended_parts(manifest):
+    # Parts added with append_incidents, in manifest order
+    return [part for part in manifest['parts'] if part['appended']] if manifest else []
+
+
+def convert_csv(csv_path, store_path=None):
+    """Parse the ticket CSV once and write it as a new typed Parquet store.
+
+    Tickets appended to the current build with append_incidents are never
+    written to the CSV, so they are carried into the new build after its
+    rows, less any ticket the CSV now holds itself. Sessions reading the
+    old build keep its files until the next build.
+    """
+    store_path = store_path or store_path_for(csv_path)
+    with store_lock(store_path):
+        previous = format_manifest(store_path)
+        df = type_incidents(pd.read_csv(csv_path))
+        manifest = new_build(store_path, {
+            'store_id': uuid.uuid4().hex,
+            'format': STORE_FORMAT,
+            'source': source_fingerprint(csv_path),
+            'version': 0,
+            'parts': [],
+        })
+        write_parts(store_path, df, manifest)
+        carried = appended_parts(previous)
+        if carried:
+            manifest['version'] += 1
+            carried = unseen_tickets(read_parts(store_path, carried, columns=None), df)
+            write_parts(store_path, carried, manifest, appended=True)
+        publish_build(store_path, manifest)
+    return store_path
+
+
+def store_is_current(manifest, csv_path):
+    # True if the store was built from the CSV at its current mtime and size
+    source = manifest and manifest['source']
+    stat = os.stat(csv_path)
+    return bool(source) and (source['mtime'], source['size']) == (stat.st_mtime, stat.st_size)
+
+
+def ensure_store(csv_path):
+    """Rebuild the store only when the CSV's content has changed.
+
+    The store is valid while the CSV's mtime and size are unchanged;
+    otherwise the CSV is hashed, and a touched but unchanged file only
+    updates the recorded mtime. A store in an older format is rebuilt.
+    Processes that find it stale wait for one of them to convert it, then
+    see the current manifest.
+    """
+    store_path = store_path_for(csv_path)
+    if store_is_current(format_manifest(store_path), csv_path):
+        return store_path
+
+    with store_lock(store_path):
+        manifest = format_manifest(store_path)
+        if store_is_current(manifest, csv_path):
+            return store_path
+        source = source_fingerprint(csv_path)
+        if manifest and manifest['source']['sha256'] == source['sha256']:
+            # Touched but not changed: keep the data, record the new mtime
+            manifest['source'] = source
+            write_manifest(store_path, manifest)
+        else:
+            convert_csv(csv_path, store_path)
+    return store_path
+
+
+def append_incidents(store_path, df):
+    """Add typed incidents as new parts and publish them with a new version.
+
+    An empty batch leaves the manifest as it is, so the dashboards keep
+    their data and the results cached under its version.
+    """
+    with store_lock(store_path):
+        manifest = read_manifest(store_path)
+        if len(df) == 0:
+            return manifest
+        manifest['version'] += 1
+        write_parts(store_path, df, manifest, appended=True)
+        write_manifest(store_path, manifest)
+    return manifest
+
+
+def part_month(part):
+    # The month=<label> directory of a part
+    return part['path'].split('/')[-2]
+
+
+def compact_store(store_path, max_parts=MAX_APPENDED_PARTS):
+    """Merge the appended parts of every month that has more than max_parts.
+
+    Each ingest adds a part, a text file and a search segment per month it
+    touches; every cold start opens them all and every search loops over
+    the segments. A merged month becomes one part, at the place of its
+    first appended part, in a new build; all other parts are kept as they
+    are, wherever they were written. Row positions change, so the result
+    is published under a new store_id and dashboards load it from scratch
+    on their next rerun. Returns the merged months.
+    """
+    with store_lock(store_path):
+        manifest = read_manifest(store_path)
+        months = {}
+        for part in appended_parts(manifest):
+            months.setdefault(part_month(part), []).append(part)
+        merged = {month: parts for month, parts in months.items() if len(parts) > max_parts}
+        if not merged:
+            return []
+
+        compacted = new_build(store_path, dict(
+            manifest, store_id=uuid.uuid4().hex, version=manifest['version'] + 1, parts=[]
+        ))
+        for part in manifest['parts']:
+            month = part_month(part)
+            if not (part['appended'] and month in merged):
+                compacted['parts'].append(part)
+            elif part is merged[month][0]:
+                write_parts(store_path, read_parts(store_path, merged[month], columns=None), compacted, appended=True)
+        publish_build(store_path, compacted)
+    return sorted(merged)
+
+
+def read_table(store_path, parts, columns=None):
+    # Memory-mapped read of the given parts, in manifest order
+    tables = [
+        pq.read_table(os.path.join(store_path, part['path']), columns=columns, memory_map=True)
+        for part in parts
+    ]
+    return pa.concat_tables(tables)
+
+
+def read_parts(store_path, parts, columns=DASHBOARD_COLUMNS, first_row=0):
+    """Frame of the given parts, indexed by row position in the store.
+
+    first_row is the position of the first row of the first part, i.e. the
+    number of rows in the parts listed before it.
+    """
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    df = read_table(store_path, parts, columns).to_pandas()
+    df.index = pd.RangeIndex(first_row, first_row + len(df))
+    return df
+
+
+def part_rows(parts, rows):
+    # (part number, row within the part) of store rows, from the manifest row counts
+    starts = np.cumsum([0] + [part['rows'] for part in parts])
+    numbers = np.searchsorted(starts, rows, 'right') - 1
+    return numbers, rows - starts[numbers]
+
+
+@lru_cache(maxsize=1024)
+def file_metadata(path):
+    # Parquet footer of a store file; files are never rewritten, so each is parsed once per process
+    return pq.read_metadata(path, memory_map=True)
+
+
+def read_rows(path, rows, columns):
+    """Rows of one Parquet file, decoding only the row groups that hold them."""
+    parquet = pq.ParquetFile(path, metadata=file_metadata(path), memory_map=True)
+    sizes = [parquet.metadata.row_group(group).num_rows for group in range(parquet.num_row_groups)]
+    group_starts = np.cumsum([0] + sizes)
+    row_groups = np.searchsorted(group_starts, rows, 'right') - 1
+    groups = np.unique(row_groups)
+    table = parquet.read_row_groups(groups.tolist(), columns=columns)
+    # Position of each row in the concatenation of the groups read
+    read_starts = np.cumsum([0] + [sizes[group] for group in groups])
+    positions = read_starts[np.searchsorted(groups, row_groups)] + rows - group_starts[row_groups]
+    return table.take(pa.array(positions, type=pa.int64())).to_pandas()
+
+
+def load_text_columns(rows, store_path, parts, columns=TEXT_COLUMNS):
+    """Free-text columns of the given store rows, indexed by row.
+
+    parts are the manifest parts the rows are numbered by. Each row is
+    located in its part and in a row group of the part's text file, so only
+    the small row groups of the requested rows are read and decoded,
+    whatever the size of the store. Columns outside DETAIL_COLUMNS are
+    read from the part itself.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    if len(rows) == 0:
+        return pd.DataFrame(columns=columns)
+    numbers, offsets = part_rows(parts, rows)
+    frames = []
+    for number in np.unique(numbers):
+        in_part = numbers == number
+        path = text_path_for(store_path, parts[number]['path'])
+        if not set(columns) <= set(DETAIL_COLUMNS):
+            path = os.path.join(store_path, parts[number]['path'])
+        frame = read_rows(path, offsets[in_part], columns)
+        frames.append(frame.set_axis(rows[in_part]))
+    return pd.concat(frames).reindex(rows)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from incident_store import DETAIL_COLUMNS, load_text_columns
+
+PAGE_SIZE = 25
+
+# Columns already in memory, shown and sortable on every page
+TABLE_COLUMNS = ['Ticket ID', 'Event Time', 'Clear Time', 'Duration', 'Region', 'District', 'Client', 'Problem Category']
+
+
+def ticket_page(data, store_path, parts, page=0, page_size=PAGE_SIZE, sort_by='Event Time', ascending=True,
+                matches=None):
+    """One page of the filtered tickets, with their text columns.
+
+    data is a filtered incident frame indexed by store row, and parts the
+    manifest parts of store_path those rows are numbered by; matches, if
+    given, are the store rows of a text search. Sorting and paging only
+    touch the in-memory columns; the text columns are read from the row
+    groups of the page_size rows that are shown. Returns the page and the
+    number of matching tickets.
+    """
+    rows = data.index.to_numpy()
+    keep = np.ones(len(rows), dtype=bool) if matches is None else np.isin(rows, matches)
+    sort_column = data[sort_by]
+    if isinstance(sort_column.dtype, pd.CategoricalDtype):
+        # Codes in label order; categories read from several parts need not be sorted
+        sort_column = sort_column.cat.reorder_categories(sort_column.cat.categories.sort_values())
+        values = sort_column.cat.codes.to_numpy()[keep]
+    else:
+        values = sort_column.to_numpy()[keep]
+    order = np.argsort(values, kind='stable')
+    if not ascending:
+        order = order[::-1]
+
+    total = len(order)
+    page_rows = np.flatnonzero(keep)[order[page * page_size:(page + 1) * page_size]]
+    page_data = data.iloc[page_rows][[column for column in TABLE_COLUMNS if column in data]]
+    text = load_text_columns(page_data.index, store_path, parts, DETAIL_COLUMNS)
+    return page_data.join(text), total
+
+
+def display_ticket_table(data, incidents, key='tickets'):
+    # data is a selection from incidents (an IncidentData), whose store and search it reads
+    st.subheader("Ticket Details")
+    query_box, sort_box, order_box = st.columns([3, 2, 1])
+    query = query_box.text_input(
+        "Search remarks and comments", key=f"{key}_search",
+        help='Words match the start of any word, so fib finds fiber; use "quotes" for an exact phrase'
+    ).strip()
+    sort_by = sort_box.selectbox("Sort by", [column for column in TABLE_COLUMNS if column in data], key=f"{key}_sort")
+    ascending = order_box.radio("Order", ['Asc', 'Desc'], key=f"{key}_order") == 'Asc'
+
+    # Store rows from the inverted index, intersected with the filtered rows
+    matches = incidents.search.rows(query) if query else None
+    total = len(data) if matches is None else int(np.isin(data.index.to_numpy(), matches).sum())
+    pages = max(1, -(-total // PAGE_SIZE))
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"{key}_page") - 1
+
+    page_data, total = ticket_page(
+        data, incidents.store_path, incidents.parts, page, PAGE_SIZE, sort_by, ascending, matches
+    )
+    st.caption(f"{total} tickets")
+    st.dataframe(page_data, use_container_width=True, hide_index=True)
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+
+def event_days(times):
+    # Day ordinal (days since 1970-01-01) for each datetime64 value
+    return np.asarray(times, dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int32)
+
+
+def day_bounds(date_range):
+    """Turn an inclusive (first day, last day) pair into datetime64 bounds.
+
+    The end bound is midnight after the last day, so a time filter of
+    start <= Event Time < end keeps the whole last day.
+    """
+    if date_range is None or len(date_range) != 2 or None in date_range:
+        return None, None
+    start = np.datetime64(pd.Timestamp(date_range[0]).date(), 'D')
+    end = np.datetime64(pd.Timestamp(date_range[1]).date(), 'D') + np.timedelta64(1, 'D')
+    return start.astype('datetime64[ns]'), end.astype('datetime64[ns]')
+
+
+def daily_counts(days):
+    """Incident count per day from an array of day ordinals.
+
+    Days without incidents are left out, as value_counts() would.
+    """
+    days = np.asarray(days)
+    if len(days) == 0:
+        return pd.DataFrame({'Date': pd.Series(dtype='datetime64[ns]'), 'Count': pd.Series(dtype='int64')})
+    first_day = days.min()
+    counts = np.bincount(days - first_day)
+    nonzero = np.flatnonzero(counts)
+    dates = (nonzero + first_day).astype('datetime64[D]').astype('datetime64[ns]')
+    return pd.DataFrame({'Date': dates, 'Count': counts[nonzero]})
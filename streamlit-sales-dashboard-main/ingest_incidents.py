@@ -0,0 +1,45 @@
+import argparse
+
+import pandas as pd
+
+from incident_mappings import normalize_incidents
+from incident_store import (
+    KEY_COLUMNS, append_incidents, compact_store, ensure_store, read_parts, type_incidents, unseen_tickets
+)
+from store_manifest import read_manifest, store_lock
+
+
+def new_tickets(batch, store_path):
+    # Drop tickets that are repeated in the batch or already in the store
+    batch = batch.drop_duplicates(KEY_COLUMNS)
+    return unseen_tickets(batch, read_parts(store_path, read_manifest(store_path)['parts'], KEY_COLUMNS))
+
+
+def ingest_batch(batch, csv_path='output_updated.csv'):
+    """Append a batch of raw export tickets to the incident store.
+
+    The batch gets the same Region/District/Client mappings as modifiy.py
+    and is deduplicated on Ticket ID + Fault ID. Running dashboards read only
+    the new parts and extend their cached index on their next rerun. A month
+    that has collected too many appended parts is merged into one part,
+    which the dashboards load from scratch.
+    """
+    store_path = ensure_store(csv_path)
+    # Deduplicate and append under one lock, so concurrent ingests cannot both add a ticket
+    with store_lock(store_path):
+        batch = new_tickets(normalize_incidents(batch.copy()), store_path)
+        append_incidents(store_path, type_incidents(batch.copy()))
+        compact_store(store_path)
+        manifest = read_manifest(store_path)
+    return len(batch), manifest['version']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Append a batch of outage tickets to the incident store")
+    parser.add_argument('batch', nargs='+', help="ticket CSV files in the output.csv export format")
+    parser.add_argument('--store-csv', default='output_updated.csv', help="CSV the dashboards' store was built from")
+    args = parser.parse_args()
+
+    for batch_path in args.batch:
+        added, version = ingest_batch(pd.read_csv(batch_path), args.store_csv)
+        print(f"{batch_path}: {added} new tickets, store version {version}")
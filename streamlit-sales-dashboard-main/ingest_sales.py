@@ -0,0 +1,27 @@
+import argparse
+
+from sales_store import CHUNK_SIZE, SALES_WORKBOOK, append_workbook, ensure_sales_store
+
+
+def ingest_workbooks(workbook_paths, store_workbook=SALES_WORKBOOK, sheet_names=None, chunk_size=CHUNK_SIZE):
+    """Append the sales sheets of more workbooks to the dashboard's store.
+
+    Each workbook is streamed chunk by chunk, so monthly files of any size
+    can be added. Yields (workbook, rows added, rows dropped).
+    """
+    store_path = ensure_sales_store(store_workbook)
+    for workbook_path in workbook_paths:
+        added, dropped = append_workbook(store_path, workbook_path, sheet_names, chunk_size)
+        yield workbook_path, added, dropped
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Append sales workbooks to the sales dashboard's store")
+    parser.add_argument('workbook', nargs='+', help="xlsx files laid out like supermarkt_sales.xlsx")
+    parser.add_argument('--sheet', action='append', help="only read this sheet (repeatable); default: every sales sheet")
+    parser.add_argument('--store-workbook', default=SALES_WORKBOOK, help="workbook the dashboard's store was built from")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    for workbook_path, added, dropped in ingest_workbooks(args.workbook, args.store_workbook, args.sheet, args.chunk_size):
+        print(f"{workbook_path}: {added} rows added, {dropped} invalid rows dropped")
@@ -1,20 +1,65 @@
+import argparse
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from incident_mappings import load_mappings, normalize_incidents
+from incident_store import type_incidents
+
+# Rows per chunk; memory use depends on this, not on the size of the export
+CHUNK_SIZE = 50_000
+
+
+def parquet_schema(table):
+    # Fixed output schema, so every chunk can be written with the same writer:
+    # categories become int32 dictionaries, other text (or all-empty) columns strings
+    fields = []
+    for field in table.schema:
+        if pa.types.is_dictionary(field.type):
+            field = pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+        elif pa.types.is_null(field.type):
+            field = pa.field(field.name, pa.string())
+        fields.append(field)
+    return pa.schema(fields)
+
 
-# Load your dataset
-df = pd.read_csv('output.csv')
+def normalize_export(input_path, output_path, output_format='csv', mappings=None, chunk_size=CHUNK_SIZE):
+    """Stream the ticket export through the region/district/client mappings.
 
-# Define a mapping for region replacements
-region_mapping = {
-    'Regional Implementation & Operations 1': 'RIO-1',
-    'Regional Implementation & Operations 2': 'RIO-2',
-    'Regional Implementation & Operations 3': 'RIO-3',
-    'Regional Implementation & Operations 4': 'RIO-4'
-    # Add more mappings if needed
-}
+    CSV output keeps the export's columns as text; Parquet output is typed
+    like the incident store. Returns the number of rows written.
+    """
+    mappings = load_mappings() if mappings is None else mappings
+    writer = None
+    rows = 0
+    try:
+        for number, chunk in enumerate(pd.read_csv(input_path, chunksize=chunk_size)):
+            chunk = normalize_incidents(chunk, mappings)
+            if output_format == 'parquet':
+                table = pa.Table.from_pandas(type_incidents(chunk), preserve_index=False)
+                if writer is None:
+                    schema = parquet_schema(table)
+                    writer = pq.ParquetWriter(output_path, schema)
+                writer.write_table(table.cast(schema))
+            else:
+                chunk.to_csv(output_path, mode='w' if number == 0 else 'a', header=number == 0, index=False)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
 
-# Replace values in the 'Region' column based on the mapping
-df['Region'] = df['Region'].replace(region_mapping)
 
-# Save the updated DataFrame to a new CSV file or overwrite the existing one
-df.to_csv('output_updated.csv', index=False)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Normalize regions, districts and clients of a ticket export")
+    parser.add_argument('input', nargs='?', default='output.csv')
+    parser.add_argument('output', nargs='?', default='output_updated.csv')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--mapping', help="JSON file with extra {column: {value: replacement}} mappings")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
 
+    # Save the updated tickets to a new CSV (or Parquet) file
+    rows = normalize_export(args.input, args.output, args.format, load_mappings(args.mapping), args.chunk_size)
+    print(f"{rows} tickets written to {args.output}")
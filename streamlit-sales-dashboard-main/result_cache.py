@@ -0,0 +1,178 @@
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+import types
+
+# One SQLite file shared by every Streamlit process started from this directory
+CACHE_PATH = os.environ.get('DASHBOARD_CACHE_PATH', 'dashboard_cache.sqlite')
+
+# Size limit of the stored results; least recently used ones are evicted past it
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+# Eviction trims to this share of the limit, so it does not run on every put
+EVICT_TO = 0.9
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+    'size INTEGER NOT NULL, used REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS results_used ON results (used)',
+]
+
+# Bumped when cached results change shape in a way their code and sources do not show
+CACHE_VERSION = 1
+
+MISSING = object()
+
+
+def content_key(*parts):
+    # sha256 of the pickled key parts; plain values pickle the same in every process
+    return hashlib.sha256(pickle.dumps(parts, protocol=4)).hexdigest()
+
+
+def local_files(namespace, directory, found):
+    # Source files in directory of the modules a namespace uses, followed through their own namespaces
+    for value in list(namespace.values()):
+        module = value if isinstance(value, types.ModuleType) else sys.modules.get(getattr(value, '__module__', None))
+        path = getattr(module, '__file__', None)
+        if path and os.path.dirname(os.path.abspath(path)) == directory and path not in found:
+            found.add(path)
+            local_files(vars(module), directory, found)
+    return found
+
+
+def source_key(func):
+    """Hash of the source of func's file and of the local modules it uses.
+
+    Results depend on more than func's own code: an edit to a helper, a
+    constant or a loader in this directory changes the key as well.
+    """
+    path = os.path.abspath(func.__code__.co_filename)
+    files = local_files(func.__globals__, os.path.dirname(path), {path})
+    digest = hashlib.sha256()
+    for file in sorted(os.path.abspath(file) for file in files if os.path.isfile(file)):
+        with open(file, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def code_key(func):
+    # Changes with CACHE_VERSION, func's code or the source it depends on, so results of older code miss
+    code = func.__code__
+    consts = tuple(const for const in code.co_consts if not isinstance(const, types.CodeType))
+    return content_key(CACHE_VERSION, func.__module__, func.__qualname__, code.co_code, repr(consts), source_key(func))
+
+
+class DiskCache:
+    """Pickled results in a SQLite file, shared across processes and restarts.
+
+    The database runs in WAL mode, so readers in other processes are not
+    blocked while one process writes. Each entry records its size and last
+    use; once the total passes max_bytes the least recently used entries
+    are deleted. Each thread gets its own connection.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self.local.connection = connection
+        return connection
+
+    def get(self, key):
+        # The stored value, or MISSING
+        connection = self.connection()
+        row = connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return MISSING
+        connection.execute('UPDATE results SET used = ? WHERE key = ?', (time.time(), key))
+        try:
+            return pickle.loads(row[0])
+        except Exception:
+            # Written by an incompatible version of a class; drop it
+            connection.execute('DELETE FROM results WHERE key = ?', (key,))
+            return MISSING
+
+    def put(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes * (1 - EVICT_TO):
+            return
+        connection = self.connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'INSERT OR REPLACE INTO results (key, value, size, used) VALUES (?, ?, ?, ?)',
+                (key, data, len(data), time.time())
+            )
+            self.evict(connection)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def evict(self, connection):
+        total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICT_TO
+        stale = []
+        for key, size in connection.execute('SELECT key, size FROM results ORDER BY used'):
+            if total <= target:
+                break
+            stale.append((key,))
+            total -= size
+        connection.executemany('DELETE FROM results WHERE key = ?', stale)
+
+
+@functools.lru_cache(maxsize=None)
+def disk_cache(path=CACHE_PATH):
+    # One DiskCache per file and process
+    return DiskCache(path)
+
+
+def disk_cached(func):
+    """Keep func's results in the shared disk cache.
+
+    The key is a hash of CACHE_VERSION, func's code, the source of the
+    local modules it uses and its arguments; as with
+    st.cache_data, arguments whose name starts with '_' are left out, so
+    callers pass a version or filter state that identifies them instead.
+    A cache that cannot be read or written is skipped, never an error.
+    Stack it under st.cache_data to keep an in-memory copy per process.
+    """
+    signature = inspect.signature(func)
+    function_key = code_key(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        arguments = signature.bind(*args, **kwargs)
+        arguments.apply_defaults()
+        hashed = [(name, value) for name, value in arguments.arguments.items() if not name.startswith('_')]
+        key = content_key(function_key, hashed)
+        cache = disk_cache()
+        try:
+            value = cache.get(key)
+        except sqlite3.Error:
+            value = MISSING
+        if value is MISSING:
+            value = func(*args, **kwargs)
+            try:
+                cache.put(key, value)
+            except sqlite3.Error:
+                pass
+        return value
+    return wrapper
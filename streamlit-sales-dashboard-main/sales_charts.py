@@ -0,0 +1,81 @@
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go  # pip install plotly
+
+BAR_COLOR = "#0083B8"
+
+# Selections whose figures are kept ready to send
+FIGURE_CACHE_SIZE = 128
+
+
+def selection_key(selection):
+    # The same choices in any order, or with repeats, give the same key
+    return tuple((column, tuple(sorted(set(values)))) for column, values in sorted(selection.items()))
+
+
+class FigureCache:
+    """Least recently used cache of figure dicts, safe across sessions."""
+
+    def __init__(self, max_entries=FIGURE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+def hourly_sales_figure(sales_by_hour):
+    # Vertical bars of Total per hour, built with graph_objects instead of px
+    return go.Figure(
+        go.Bar(
+            x=sales_by_hour.index, y=sales_by_hour["Total"], marker_color=BAR_COLOR,
+            hovertemplate="hour=%{x}<br>Total=%{y}<extra></extra>",
+        ),
+        layout=dict(
+            title="<b>Sales by hour</b>",
+            template="plotly_white",
+            xaxis=dict(title="hour", tickmode="linear"),
+            yaxis=dict(title="Total", showgrid=False),
+            plot_bgcolor="rgba(0,0,0,0)",
+        ),
+    )
+
+
+def product_sales_figure(sales_by_product_line):
+    # Horizontal bars of Total per product line
+    return go.Figure(
+        go.Bar(
+            x=sales_by_product_line["Total"], y=sales_by_product_line.index.astype(str), orientation="h",
+            marker_color=BAR_COLOR, hovertemplate="Total=%{x}<br>Product line=%{y}<extra></extra>",
+        ),
+        layout=dict(
+            title="<b>Sales by Product Line</b>",
+            template="plotly_white",
+            xaxis=dict(title="Total", showgrid=False),
+            yaxis=dict(title="Product line"),
+            plot_bgcolor="rgba(0,0,0,0)",
+        ),
+    )
+
+
+def figure_dict(figure):
+    """The figure as a dict of plain lists and numbers, for st.plotly_chart.
+
+    st.plotly_chart only serializes a dict, so a cached one is sent without
+    any plotly or pandas work.
+    """
+    return json.loads(figure.to_json())
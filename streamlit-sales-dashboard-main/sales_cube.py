@@ -0,0 +1,94 @@
+from fractions import Fraction
+
+import numpy as np
+import pandas as pd
+
+from sales_filter import SalesFilter
+
+# Dimensions of one cube cell
+CUBE_DIMENSIONS = ['City', 'Customer_type', 'Gender', 'Product line', 'hour']
+
+# Measures summed and counted per cell
+CUBE_MEASURES = ['Total', 'Rating']
+
+# Most decimals a measure may have to be summed exactly
+MAX_DECIMALS = 9
+
+
+def decimal_places(values):
+    """Fewest decimals that represent every value exactly, or None.
+
+    Values read from a workbook are decimals like 548.9715; scaled by 10**d
+    they are integers, whose sums are exact in any order.
+    """
+    values = values[~np.isnan(values)]
+    for decimals in range(MAX_DECIMALS + 1):
+        scaled = np.round(values * 10 ** decimals)
+        if np.abs(scaled).max(initial=0) >= 2 ** 53:
+            return None
+        if np.array_equal(scaled / 10 ** decimals, values):
+            return decimals
+    return None
+
+
+def scaled_measure(values, decimals):
+    # Integer units of 10**-decimals, 0 for missing values
+    values = np.nan_to_num(values)
+    if decimals is None:
+        return values
+    return np.round(values * 10 ** decimals).astype(np.int64)
+
+
+class SalesCube:
+    """Sum and count of Total and Rating per City x Customer_type x Gender x
+    Product line x hour.
+
+    Measures are summed as integers in units of their decimal places, so
+    adding up cube cells gives exactly the sum of the selected rows (the
+    sum of their decimal values, correctly rounded), whatever the order.
+    """
+
+    def __init__(self, df):
+        keys = df[CUBE_DIMENSIONS]
+        cells = {}
+        self.decimals = {}
+        for measure in CUBE_MEASURES:
+            values = df[measure].to_numpy(dtype='float64')
+            self.decimals[measure] = decimal_places(values)
+            cells[f'{measure} sum'] = scaled_measure(values, self.decimals[measure])
+            cells[f'{measure} count'] = (~np.isnan(values)).astype(np.int64)
+        cells['Rows'] = np.ones(len(df), dtype=np.int64)
+        grouped = pd.DataFrame(cells, index=pd.MultiIndex.from_frame(keys))
+        self.cells = grouped.groupby(level=CUBE_DIMENSIONS, observed=True, sort=False).sum().reset_index()
+        self.filter = SalesFilter(self.cells, [column for column in CUBE_DIMENSIONS if column != 'hour'])
+
+    def select(self, selections):
+        # Cells matching {column: selected values}, as SalesFilter.select
+        return self.cells[self.filter.mask(selections)]
+
+    def exact_sum(self, cells, measure):
+        total = cells[f'{measure} sum'].sum()
+        decimals = self.decimals[measure]
+        return Fraction(int(total), 10 ** decimals) if decimals is not None else Fraction(float(total))
+
+    def kpis(self, selections):
+        """Row count and total/mean Total and mean Rating of the selection."""
+        cells = self.select(selections)
+        total = self.exact_sum(cells, 'Total')
+        rating = self.exact_sum(cells, 'Rating')
+        total_count, rating_count = int(cells['Total count'].sum()), int(cells['Rating count'].sum())
+        return {
+            'rows': int(cells['Rows'].sum()),
+            'total_sales': float(total),
+            'average_sale': float(total / total_count) if total_count else np.nan,
+            'average_rating': float(rating / rating_count) if rating_count else np.nan,
+        }
+
+    def sum_by(self, column, selections, measure='Total'):
+        """[measure] frame indexed by column, like
+        selection.groupby(column)[[measure]].sum() over the selected rows."""
+        cells = self.select(selections)
+        sums = cells.groupby(column, observed=True)[f'{measure} sum'].sum()
+        decimals = self.decimals[measure]
+        values = sums.to_numpy() if decimals is None else [float(Fraction(int(v), 10 ** decimals)) for v in sums]
+        return pd.DataFrame({measure: values}, index=sums.index)
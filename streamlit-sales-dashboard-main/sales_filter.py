@@ -0,0 +1,47 @@
+import numpy as np
+
+# Sidebar dimensions that can be filtered on
+FILTER_COLUMNS = ['City', 'Customer_type', 'Gender', 'Branch', 'Payment', 'Product line']
+
+
+class SalesFilter:
+    """Categorical codes of the filter dimensions, for mask-based filtering.
+
+    Each column is encoded once, at load. A multiselect becomes a small
+    lookup table from code to allowed, and the row mask is that table
+    indexed by the codes, so a rerun never parses an expression or compares
+    strings per row.
+    """
+
+    def __init__(self, df, columns=FILTER_COLUMNS):
+        self.data = df
+        self.categories = {}
+        self.codes = {}
+        for column in columns:
+            values = df[column].astype('category')
+            self.categories[column] = values.cat.categories
+            self.codes[column] = values.cat.codes.to_numpy()
+
+    def options(self, column):
+        # Values present, in label order, so the widgets don't depend on how the store is partitioned
+        codes = np.unique(self.codes[column])
+        return sorted(self.categories[column][codes[codes >= 0]])
+
+    def allowed(self, column, values):
+        # Lookup table code -> allowed; the extra last slot is code -1 (missing), never allowed
+        categories = self.categories[column]
+        table = np.zeros(len(categories) + 1, dtype=bool)
+        positions = categories.get_indexer(list(values))
+        table[positions[positions >= 0]] = True
+        return table
+
+    def mask(self, selections):
+        """Row mask for {column: selected values}; a column set to None is not filtered."""
+        mask = np.ones(len(self.data), dtype=bool)
+        for column, values in selections.items():
+            if values is not None:
+                mask &= self.allowed(column, values)[self.codes[column]]
+        return mask
+
+    def select(self, selections):
+        return self.data[self.mask(selections)]
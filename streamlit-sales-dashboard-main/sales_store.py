@@ -0,0 +1,325 @@
+import os
+import uuid
+
+import numpy as np
+import openpyxl  # pip install openpyxl
+import pandas as pd  # pip install pandas
+import pyarrow as pa  # pip install pyarrow
+import pyarrow.parquet as pq
+
+from sales_time import clock_times, time_columns, time_of_day_seconds
+from store_manifest import (
+    file_hash, new_build, part_path, publish_build, read_manifest, source_fingerprint, store_lock, write_manifest
+)
+
+SALES_WORKBOOK = 'supermarkt_sales.xlsx'
+
+# Columns of a sales sheet, in workbook order, with their stored types
+SALES_SCHEMA = pa.schema([
+    ('Invoice ID', pa.string()),
+    ('Branch', pa.dictionary(pa.int32(), pa.string())),
+    ('City', pa.dictionary(pa.int32(), pa.string())),
+    ('Customer_type', pa.dictionary(pa.int32(), pa.string())),
+    ('Gender', pa.dictionary(pa.int32(), pa.string())),
+    ('Product line', pa.dictionary(pa.int32(), pa.string())),
+    ('Unit price', pa.float64()),
+    ('Quantity', pa.int64()),
+    ('Tax 5%', pa.float64()),
+    ('Total', pa.float64()),
+    ('Date', pa.timestamp('ns')),
+    ('Time', pa.time64('us')),
+    ('Payment', pa.dictionary(pa.int32(), pa.string())),
+    ('cogs', pa.float64()),
+    ('gross margin percentage', pa.float64()),
+    ('gross income', pa.float64()),
+    ('Rating', pa.float64()),
+    ('hour', pa.int8()),
+    ('weekday', pa.int8()),
+    ('month', pa.int8()),
+    ('time bucket', pa.int8()),
+])
+SALES_COLUMNS = SALES_SCHEMA.names[:-4]
+
+# Bumped when SALES_SCHEMA or the store layout changes, so older stores are rebuilt
+STORE_FORMAT = 4
+
+# Low-cardinality columns the sidebar filters and charts group by
+SALES_CATEGORY_COLUMNS = [field.name for field in SALES_SCHEMA if pa.types.is_dictionary(field.type)]
+SALES_NUMBER_COLUMNS = ['Unit price', 'Quantity', 'Tax 5%', 'Total', 'cogs', 'gross margin percentage', 'gross income', 'Rating']
+
+# A sales row needs these to be counted in the dashboard
+REQUIRED_COLUMNS = ['Invoice ID', 'City', 'Customer_type', 'Gender', 'Product line', 'Total', 'Date', 'Time']
+
+# Rows held in memory at a time while reading a workbook
+CHUNK_SIZE = 50_000
+
+# Rows searched for the header line above the data
+HEADER_SEARCH_ROWS = 20
+
+
+def store_path_for(workbook_path):
+    # The store is a directory of Parquet parts, partitioned by sale month
+    return os.path.splitext(workbook_path)[0] + '.parquet'
+
+
+def sheet_chunks(sheet, chunk_size=CHUNK_SIZE):
+    """Raw frames of up to chunk_size rows from a read-only worksheet.
+
+    The header is the first row holding 'Invoice ID', wherever the sheet's
+    title rows and margin put it; the data ends at the first empty row.
+    """
+    rows = sheet.iter_rows(values_only=True)
+    for _, row in zip(range(HEADER_SEARCH_ROWS), rows):
+        if 'Invoice ID' in row:
+            header = row
+            break
+    else:
+        return
+    positions = [header.index(column) for column in SALES_COLUMNS if column in header]
+    columns = [header[position] for position in positions]
+
+    chunk = []
+    for row in rows:
+        if all(value is None for value in row):
+            break
+        chunk.append([row[position] if position < len(row) else None for position in positions])
+        if len(chunk) == chunk_size:
+            yield pd.DataFrame(chunk, columns=columns)
+            chunk = []
+    if chunk:
+        yield pd.DataFrame(chunk, columns=columns)
+
+
+def type_sales(df):
+    """Validate and type a raw chunk of sales rows.
+
+    Numbers and dates that do not parse become missing; rows missing a
+    required value are dropped. Returns the typed rows and the number of
+    rows dropped.
+    """
+    missing = [column for column in SALES_COLUMNS if column not in df]
+    if missing:
+        raise ValueError(f"Sales sheet is missing the columns {missing}")
+    df = df[SALES_COLUMNS].copy()
+    for column in SALES_NUMBER_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    seconds = time_of_day_seconds(df['Time'])
+    df['Time'] = clock_times(seconds)
+    # Add hour, weekday, month and time bucket columns to dataframe
+    df = pd.concat([df, time_columns(df['Date'], seconds).set_axis(df.index)], axis=1)
+
+    valid = df[REQUIRED_COLUMNS].notna().all(axis=1) & df['Quantity'].notna()
+    df = df[valid]
+    df = df.astype({'Quantity': 'int64'})
+    for column in SALES_CATEGORY_COLUMNS:
+        values = df[column]
+        df[column] = values.where(values.isna(), values.astype(str)).astype('category')
+    return df.reset_index(drop=True), int((~valid).sum())
+
+
+def read_workbook(workbook_path, sheet_names=None, chunk_size=CHUNK_SIZE):
+    """Typed chunks of every sales sheet of a workbook, streamed.
+
+    openpyxl reads the workbook in read-only mode, so memory holds one
+    chunk, whatever the size of the file. sheet_names limits the sheets
+    read; otherwise every sheet with an 'Invoice ID' header is read.
+    Yields (sheet name, typed chunk, rows dropped).
+    """
+    workbook = openpyxl.load_workbook(workbook_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            if sheet_names and sheet.title not in sheet_names:
+                continue
+            for chunk in sheet_chunks(sheet, chunk_size):
+                df, dropped = type_sales(chunk)
+                yield sheet.title, df, dropped
+    finally:
+        workbook.close()
+
+
+class PartWriter:
+    # One open Parquet writer per sale month, so each chunk is written as it is read
+    def __init__(self, store_path, manifest, appended=False):
+        self.store_path = store_path
+        self.manifest = manifest
+        self.appended = appended
+        self.writers = {}
+        self.rows = {}
+
+    def write(self, df):
+        months = df['Date'].values.astype('datetime64[M]')
+        for month in np.unique(months):
+            label = 'unknown' if np.isnat(month) else str(month)
+            part = df[np.isnat(months)] if np.isnat(month) else df[months == month]
+            if label not in self.writers:
+                relative_path = part_path(self.manifest, label, self.manifest['version'])
+                os.makedirs(os.path.join(self.store_path, os.path.dirname(relative_path)), exist_ok=True)
+                writer = pq.ParquetWriter(os.path.join(self.store_path, relative_path), SALES_SCHEMA)
+                self.writers[label] = (relative_path, writer)
+                self.rows[label] = 0
+            table = pa.Table.from_pandas(part, preserve_index=False).cast(SALES_SCHEMA)
+            self.writers[label][1].write_table(table)
+            self.rows[label] += len(part)
+
+    def close(self):
+        # Close the files and return their manifest entries
+        parts = []
+        for label in sorted(self.writers):
+            relative_path, writer = self.writers[label]
+            writer.close()
+            parts.append({'path': relative_path, 'rows': self.rows[label], 'appended': self.appended})
+        return parts
+
+
+def write_workbook(store_path, manifest, workbook_path, digest, sheet_names=None, chunk_size=CHUNK_SIZE,
+                   appended=False):
+    # Stream the workbook into new parts of the manifest's build, as a new version
+    manifest['version'] += 1
+    writer = PartWriter(store_path, manifest, appended)
+    added = dropped = 0
+    try:
+        for _, df, chunk_dropped in read_workbook(workbook_path, sheet_names, chunk_size):
+            writer.write(df)
+            added += len(df)
+            dropped += chunk_dropped
+    finally:
+        parts = writer.close()
+    manifest['parts'].extend(parts)
+    manifest['workbooks'].append(digest)
+    return added, dropped
+
+
+def append_workbook(store_path, workbook_path, sheet_names=None, chunk_size=CHUNK_SIZE):
+    """Stream a workbook's sales sheets into the store as new parts.
+
+    A workbook whose content was already ingested is skipped. Returns the
+    number of rows added and the number dropped by validation.
+    """
+    digest = file_hash(workbook_path)
+    with store_lock(store_path):
+        manifest = read_manifest(store_path)
+        if digest in manifest['workbooks']:
+            return 0, 0
+        added, dropped = write_workbook(
+            store_path, manifest, workbook_path, digest, sheet_names, chunk_size, appended=True
+        )
+        write_manifest(store_path, manifest)
+    return added, dropped
+
+
+def appended_parts(manifest):
+    # Parts written by append_workbook, in manifest order
+    return [part for part in manifest['parts'] if part['appended']] if manifest else []
+
+
+def carry_appended(store_path, previous, manifest):
+    """Copy the appended workbooks of the previous build into manifest's build.
+
+    They are not in the dashboard's workbook, so a rebuild from it alone
+    would lose them. Their rows are copied from the previous build's parts,
+    so the workbooks need not still exist, as one new version; invoices the
+    dashboard's workbook now holds itself are left out. Their digests stay
+    listed, so they are not ingested twice.
+    """
+    parts = appended_parts(previous)
+    if not parts:
+        return
+    invoices = read_parts(store_path, manifest['parts'], ['Invoice ID'])['Invoice ID']
+    carried = read_parts(store_path, parts)
+    carried = carried[~carried['Invoice ID'].isin(invoices)]
+    manifest['version'] += 1
+    writer = PartWriter(store_path, manifest, appended=True)
+    try:
+        writer.write(carried)
+    finally:
+        manifest['parts'].extend(writer.close())
+    manifest['workbooks'].extend(previous['workbooks'][1:])
+
+
+def convert_workbook(workbook_path, store_path=None):
+    """Stream the workbook into a new build of the store and make it current.
+
+    Workbooks appended to the previous build are carried into the new one;
+    sessions reading the previous build keep its files until the next build.
+    """
+    store_path = store_path or store_path_for(workbook_path)
+    with store_lock(store_path):
+        previous = format_manifest(store_path)
+        source = source_fingerprint(workbook_path)
+        manifest = new_build(store_path, {
+            'store_id': uuid.uuid4().hex,
+            'format': STORE_FORMAT,
+            'source': source,
+            'version': 0,
+            'parts': [],
+            'workbooks': [],
+        })
+        write_workbook(store_path, manifest, workbook_path, source['sha256'])
+        carry_appended(store_path, previous, manifest)
+        publish_build(store_path, manifest)
+    return store_path
+
+
+def format_manifest(store_path):
+    # The store's manifest, or None if there is no store in the current format
+    manifest = read_manifest(store_path) if os.path.isdir(store_path) else None
+    if manifest is not None and manifest.get('format') != STORE_FORMAT:
+        return None
+    return manifest
+
+
+def mirrors(manifest, workbook_path):
+    # True if the store was built from the workbook at its current mtime and size
+    source = manifest and manifest['source']
+    stat = os.stat(workbook_path)
+    return bool(source) and (source['mtime'], source['size']) == (stat.st_mtime, stat.st_size)
+
+
+def ensure_sales_store(workbook_path=SALES_WORKBOOK):
+    """Path of the workbook's store, converting the workbook if it changed.
+
+    The store is valid while the workbook's mtime and size are unchanged;
+    otherwise the workbook is hashed, and only a changed hash means reading
+    it again with openpyxl. A store in an older format is rebuilt.
+    """
+    store_path = store_path_for(workbook_path)
+    if mirrors(format_manifest(store_path), workbook_path):
+        return store_path
+
+    with store_lock(store_path):
+        # Another process may have brought it up to date while this one waited
+        manifest = format_manifest(store_path)
+        if mirrors(manifest, workbook_path):
+            return store_path
+        source = source_fingerprint(workbook_path)
+        if manifest and manifest['source'] and manifest['source']['sha256'] == source['sha256']:
+            # Touched but not changed: keep the data, record the new mtime
+            manifest['source'] = source
+            write_manifest(store_path, manifest)
+        else:
+            convert_workbook(workbook_path, store_path)
+    return store_path
+
+
+def sales_version(store_path):
+    # Changes whenever the store is rebuilt or a workbook is appended
+    manifest = read_manifest(store_path)
+    return manifest['store_id'], manifest['version']
+
+
+def read_parts(store_path, parts, columns=None):
+    # Memory-mapped read of the given parts, in manifest order
+    if not parts:
+        schema = SALES_SCHEMA if columns is None else pa.schema([SALES_SCHEMA.field(column) for column in columns])
+        return schema.empty_table().to_pandas()
+    tables = [
+        pq.read_table(os.path.join(store_path, part['path']), columns=columns, memory_map=True)
+        for part in parts
+    ]
+    return pa.concat_tables(tables).to_pandas()
+
+
+def read_sales(store_path, columns=None):
+    # All parts of the store's current build
+    return read_parts(store_path, read_manifest(store_path)['parts'], columns)
@@ -0,0 +1,102 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa  # pip install pyarrow
+import pyarrow.compute as pc
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Width of one time-of-day bucket, for time-of-day heatmaps
+TIME_BUCKET_MINUTES = 30
+
+# Time texts parsed by position: HH:MM or HH:MM:SS
+CLOCK_PATTERN = r'^\d\d:\d\d(:\d\d)?$'
+
+# Derived columns, all small integers
+TIME_COLUMNS = {'hour': 'int8', 'weekday': 'int8', 'month': 'int8', 'time bucket': 'int8'}
+
+
+def clock_seconds(texts):
+    # Fixed-width parse of an Arrow string array; -1 where it is not a clock time
+    valid = pc.fill_null(pc.match_substring_regex(texts, CLOCK_PATTERN), False)
+    texts = pc.if_else(valid, texts, '00:00:00')
+    fields = [pc.cast(pc.utf8_slice_codeunits(texts, start, start + 2), pa.int32()) for start in (0, 3)]
+    seconds = pc.utf8_slice_codeunits(texts, 6, 8)
+    seconds = pc.cast(pc.if_else(pc.equal(seconds, ''), '0', seconds), pa.int32())
+    total = pc.add(pc.add(pc.multiply(fields[0], 3600), pc.multiply(fields[1], 60)), seconds)
+    return np.where(valid.to_numpy(zero_copy_only=False), total.to_numpy(), -1)
+
+
+def cell_seconds(value):
+    # Seconds of one cell of any type, for columns that mix types
+    if isinstance(value, datetime.time):
+        return value.hour * 3600 + value.minute * 60 + value.second
+    if isinstance(value, datetime.datetime):
+        return cell_seconds(value.time())
+    if isinstance(value, str):
+        return int(clock_seconds(pa.array([value]))[0])
+    if isinstance(value, (int, float)) and not np.isnan(value):
+        return int(round(value % 1 * SECONDS_PER_DAY)) % SECONDS_PER_DAY
+    return -1
+
+
+def time_of_day_seconds(values):
+    """Seconds since midnight of Excel time cells, -1 where missing or invalid.
+
+    openpyxl gives datetime.time values, which Arrow converts to integers
+    in bulk; text is parsed by position and day fractions are scaled. No
+    cell is parsed into a full datetime.
+    """
+    values = np.asarray(values, dtype=object)
+    try:
+        array = pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return np.fromiter((cell_seconds(value) for value in values), dtype=np.int32, count=len(values))
+
+    if pa.types.is_time(array.type):
+        micros = array.cast(pa.time64('us')).cast(pa.int64())
+        seconds = pc.divide(micros, 1_000_000)
+    elif pa.types.is_timestamp(array.type):
+        micros = array.cast(pa.timestamp('us')).cast(pa.int64())
+        seconds = pc.divide(micros, 1_000_000)
+        seconds = pc.subtract(seconds, pc.multiply(pc.divide(seconds, SECONDS_PER_DAY), SECONDS_PER_DAY))
+    elif pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+        return clock_seconds(array).astype(np.int32)
+    elif pa.types.is_floating(array.type) or pa.types.is_integer(array.type):
+        fractions = array.cast(pa.float64()).to_numpy(zero_copy_only=False)
+        seconds = np.round(np.mod(fractions, 1) * SECONDS_PER_DAY) % SECONDS_PER_DAY
+        return np.where(np.isnan(fractions), -1, seconds).astype(np.int32)
+    elif pa.types.is_null(array.type):
+        return np.full(len(values), -1, dtype=np.int32)
+    else:
+        return np.fromiter((cell_seconds(value) for value in values), dtype=np.int32, count=len(values))
+    return pc.fill_null(seconds, -1).to_numpy().astype(np.int32)
+
+
+def clock_times(seconds):
+    # datetime.time objects (None where seconds is -1), built by Arrow
+    micros = pa.array(seconds.astype(np.int64) * 1_000_000, mask=seconds < 0)
+    return micros.cast(pa.time64('us')).to_pandas().to_numpy()
+
+
+def time_columns(dates, seconds):
+    """hour, weekday (Monday 0), month and time bucket of each sale.
+
+    Derived with integer arithmetic from the day ordinal of dates and the
+    seconds since midnight; rows without a time or date get -1.
+    """
+    days = np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[D]')
+    months = days.astype('datetime64[M]').astype(np.int64)
+    has_date = ~np.isnat(days)
+    has_time = seconds >= 0
+    columns = {
+        'hour': np.where(has_time, seconds // 3600, -1),
+        # Day ordinal 0 (1970-01-01) was a Thursday
+        'weekday': np.where(has_date, (days.astype(np.int64) + 3) % 7, -1),
+        'month': np.where(has_date, months % 12 + 1, -1),
+        'time bucket': np.where(has_time, seconds // (TIME_BUCKET_MINUTES * 60), -1),
+    }
+    return pd.DataFrame({
+        name: values.astype(TIME_COLUMNS[name]) for name, values in columns.items()
+    })
@@ -0,0 +1,135 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    import msvcrt
+
+MANIFEST_NAME = '_manifest.json'
+
+# Store directories locked by this thread, so a locked call can call another
+held_locks = threading.local()
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(path):
+    # mtime and size for a cheap staleness check, SHA-256 to tell a touch from an edit
+    stat = os.stat(path)
+    return {'mtime': stat.st_mtime, 'size': stat.st_size, 'sha256': file_hash(path)}
+
+
+def read_manifest(store_path):
+    path = os.path.join(store_path, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_manifest(store_path, manifest):
+    # Write to a temporary file and rename, so readers never see half a manifest
+    path = os.path.join(store_path, MANIFEST_NAME)
+    temporary = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temporary, path)
+
+
+def lock_file(f):
+    if os.name == 'nt':
+        while True:
+            try:
+                # Retries for about 10 seconds, then raises
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def unlock_file(f):
+    if os.name == 'nt':
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def store_lock(store_path):
+    """Exclusive lock on a store, across threads and processes.
+
+    Every change to a store (a build, an append, a manifest update) runs
+    under it, so manifest read-modify-writes and part versions never race.
+    The lock file sits next to the store, which may not exist yet. A thread
+    that already holds the lock enters again without blocking.
+    """
+    held = held_locks.__dict__.setdefault('paths', {})
+    key = os.path.abspath(store_path)
+    if held.get(key):
+        held[key] += 1
+        try:
+            yield
+        finally:
+            held[key] -= 1
+        return
+    with open(store_path + '.lock', 'a+b') as f:
+        lock_file(f)
+        held[key] = 1
+        try:
+            yield
+        finally:
+            held[key] = 0
+            unlock_file(f)
+
+
+def new_build(store_path, manifest):
+    """Give a new manifest its own build directory inside the store.
+
+    Parts of a build are written under its directory, and the build goes
+    live when its manifest replaces the store's; readers of the previous
+    build keep their files. Call with store_lock held.
+    """
+    if os.path.exists(store_path) and not os.path.isdir(store_path):
+        os.remove(store_path)
+    manifest['build'] = f"build-{manifest['store_id']}"
+    os.makedirs(os.path.join(store_path, manifest['build']))
+    return manifest
+
+
+def part_path(manifest, label, version):
+    # Store-relative path of a part of one month
+    return f"{manifest['build']}/month={label}/part-{version:05d}.parquet"
+
+
+def top_directories(manifest):
+    return {part['path'].split('/')[0] for part in manifest['parts']} | {manifest.get('build')}
+
+
+def publish_build(store_path, manifest):
+    """Make a build the store's current one, keeping the previous build.
+
+    Sessions still reading the previous build keep working until their next
+    rerun; anything older, or left over from a failed build, is removed.
+    Call with store_lock held.
+    """
+    previous = read_manifest(store_path)
+    write_manifest(store_path, manifest)
+    keep = top_directories(manifest) | (top_directories(previous) if previous else set())
+    for name in os.listdir(store_path):
+        path = os.path.join(store_path, name)
+        if name not in keep and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,178 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from incident_cube import CUBE_DIMENSIONS, IncidentCube
+from incident_hierarchy import DimensionHierarchy
+from incident_index import IncidentIndex
+from incident_search import TicketSearch
+from incident_store import (
+    DASHBOARD_COLUMNS, DETAIL_COLUMNS, STORE_FORMAT, append_incidents, compact_store, concat_incidents, ensure_store,
+    load_text_columns, read_parts, type_incidents,
+)
+from store_manifest import read_manifest, write_manifest
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output_updated.csv')
+
+
+def sample_store(tmp_path, rows=None, df=None):
+    # A CSV of the first rows of the sample export (or of df), and the full frame
+    csv_path = str(tmp_path / 'tickets.csv')
+    if rows is None and df is None:
+        shutil.copy(SAMPLE_CSV, csv_path)
+        return csv_path, pd.read_csv(SAMPLE_CSV)
+    df = pd.read_csv(SAMPLE_CSV) if df is None else df
+    df.iloc[:rows].to_csv(csv_path, index=False)
+    return csv_path, df
+
+
+def store_rows(store_path, columns=DASHBOARD_COLUMNS):
+    return read_parts(store_path, read_manifest(store_path)['parts'], columns)
+
+
+def test_appended_index_matches_rebuild(tmp_path):
+    # Appending the tail of the export gives the index, cube and hierarchy of a full build
+    df = pd.read_csv(SAMPLE_CSV)
+    # Some late tickets without a Client, District or Problem Category, which no option lists
+    df.loc[1000:1004, 'Client'] = np.nan
+    df.loc[1005:1007, 'District'] = np.nan
+    df.loc[1008:1009, 'Problem Category'] = np.nan
+    csv_path, df = sample_store(tmp_path, 1000, df)
+    store_path = ensure_store(csv_path)
+    index = IncidentIndex(store_rows(store_path))
+    cube = IncidentCube(index.data)
+    hierarchy = DimensionHierarchy(cube.cells)
+
+    first_row = len(index)
+    append_incidents(store_path, type_incidents(df.iloc[1000:].copy()))
+    added = read_parts(store_path, read_manifest(store_path)['parts'][1:], first_row=first_row)
+    index, cube, hierarchy = index.appended(added), cube.appended(added), hierarchy.appended(added)
+
+    (tmp_path / 'full').mkdir()
+    full_path = ensure_store(sample_store(tmp_path / 'full', df=df)[0])
+    rebuilt = IncidentIndex(store_rows(full_path))
+    rebuilt_cube = IncidentCube(rebuilt.data)
+
+    pd.testing.assert_frame_equal(index.data.reset_index(drop=True), rebuilt.data.reset_index(drop=True))
+    np.testing.assert_array_equal(index.times, rebuilt.times)
+    for column, bitmaps in rebuilt.bitmaps.items():
+        assert set(index.bitmaps[column]) == set(bitmaps)
+        for value, bitmap in bitmaps.items():
+            np.testing.assert_array_equal(index.bitmaps[column][value], bitmap)
+    # Cells are only ordered by day, so compare them in one order of their labels
+    def by_labels(cells):
+        by = CUBE_DIMENSIONS + ['Event Day']
+        return cells.sort_values(by, key=lambda values: values.astype(str), ignore_index=True)
+    pd.testing.assert_frame_equal(
+        by_labels(cube.cells), by_labels(rebuilt_cube.cells),
+        check_categorical=False,
+    )
+    assert hierarchy.levels == DimensionHierarchy(rebuilt_cube.cells).levels
+
+
+def test_touched_csv_keeps_store(tmp_path):
+    csv_path, df = sample_store(tmp_path)
+    store_path = ensure_store(csv_path)
+    append_incidents(store_path, type_incidents(df.iloc[:3].assign(**{'Fault ID': -1})))
+    store_id = read_manifest(store_path)['store_id']
+
+    os.utime(csv_path, (0, 0))
+    ensure_store(csv_path)
+    assert read_manifest(store_path)['store_id'] == store_id
+    assert len(store_rows(store_path)) == len(df) + 3
+
+
+def test_rebuild_carries_appended_tickets(tmp_path):
+    csv_path, df = sample_store(tmp_path, 1000)
+    store_path = ensure_store(csv_path)
+    append_incidents(store_path, type_incidents(df.iloc[1000:1008].copy()))
+
+    # The CSV now holds three of the appended tickets itself
+    df.iloc[:1003].to_csv(csv_path, index=False)
+    ensure_store(csv_path)
+    keys = store_rows(store_path, ['Ticket ID', 'Fault ID'])
+    expected = df.iloc[:1008][['Ticket ID', 'Fault ID']]
+    assert len(keys) == 1008
+    pd.testing.assert_frame_equal(
+        keys.sort_values(['Ticket ID', 'Fault ID'], ignore_index=True),
+        expected.sort_values(['Ticket ID', 'Fault ID'], ignore_index=True),
+    )
+
+
+def test_append_matches_columns_by_name(tmp_path):
+    csv_path, df = sample_store(tmp_path)
+    store_path = ensure_store(csv_path)
+    batch = type_incidents(df.iloc[:2].assign(**{'Fault ID': -1}))
+    append_incidents(store_path, batch[batch.columns[::-1]])
+    appended = store_rows(store_path).iloc[len(df):].reset_index(drop=True)
+    expected = batch[DASHBOARD_COLUMNS].sort_values('Event Time', kind='stable', ignore_index=True)
+    pd.testing.assert_frame_equal(appended, expected, check_categorical=False, check_dtype=False)
+
+    with pytest.raises(ValueError, match='Duration'):
+        append_incidents(store_path, batch.drop(columns='Duration'))
+
+
+def test_text_columns_of_any_rows(tmp_path):
+    csv_path, df = sample_store(tmp_path)
+    store_path = ensure_store(csv_path)
+    append_incidents(store_path, type_incidents(df.iloc[:100].assign(**{'Fault ID': -1})))
+    parts = read_manifest(store_path)['parts']
+    full = store_rows(store_path, DETAIL_COLUMNS)
+    rows = np.random.default_rng(0).choice(len(full), 50, replace=False)
+    text = load_text_columns(rows, store_path, parts, DETAIL_COLUMNS)
+    pd.testing.assert_frame_equal(text.astype(object), full.loc[rows].astype(object))
+
+
+def test_concat_keeps_categories_in_label_order():
+    old = type_incidents(pd.DataFrame({'District': ['Bagerhat', 'Tangail']}))
+    new = type_incidents(pd.DataFrame({'District': ['Aaaland']}))
+    district = concat_incidents([old, new])['District']
+    assert list(district.cat.categories) == ['Aaaland', 'Bagerhat', 'Tangail']
+    assert list(district.sort_values()) == ['Aaaland', 'Bagerhat', 'Tangail']
+
+
+def test_empty_append_keeps_version(tmp_path):
+    csv_path, df = sample_store(tmp_path)
+    store_path = ensure_store(csv_path)
+    manifest = read_manifest(store_path)
+    append_incidents(store_path, type_incidents(df.iloc[:0].copy()))
+    assert read_manifest(store_path) == manifest
+
+
+def test_older_format_is_rebuilt(tmp_path):
+    csv_path, df = sample_store(tmp_path)
+    store_path = ensure_store(csv_path)
+    manifest = read_manifest(store_path)
+    write_manifest(store_path, dict(manifest, format=STORE_FORMAT - 1))
+    ensure_store(csv_path)
+    assert read_manifest(store_path)['store_id'] != manifest['store_id']
+    assert read_manifest(store_path)['format'] == STORE_FORMAT
+
+
+def test_compaction_merges_a_months_appended_parts(tmp_path):
+    csv_path, df = sample_store(tmp_path, 1000)
+    store_path = ensure_store(csv_path)
+    for first in range(1000, 1020, 5):
+        append_incidents(store_path, type_incidents(df.iloc[first:first + 5].copy()))
+    before = read_manifest(store_path)
+
+    assert compact_store(store_path, max_parts=3) == ['month=2023-08']
+    manifest = read_manifest(store_path)
+    assert manifest['store_id'] != before['store_id']
+    assert [part['appended'] for part in manifest['parts']] == [False, True]
+
+    # The same tickets, text and search results, from two parts
+    def tickets(parts):
+        rows = read_parts(store_path, parts, DASHBOARD_COLUMNS + DETAIL_COLUMNS)
+        return rows.sort_values(['Event Time', 'Ticket ID'], kind='stable', ignore_index=True).astype(object)
+    pd.testing.assert_frame_equal(tickets(manifest['parts']), tickets(before['parts']))
+    rows = np.arange(1000, 1020)
+    text = load_text_columns(rows, store_path, manifest['parts'], DETAIL_COLUMNS)
+    pd.testing.assert_frame_equal(text.astype(object), store_rows(store_path, DETAIL_COLUMNS).loc[rows].astype(object))
+    before_search, search = (TicketSearch().appended(store_path, parts) for parts in (before['parts'], manifest['parts']))
+    assert len(search.rows('fib')) == len(before_search.rows('fib')) > 0
+
+    assert compact_store(store_path, max_parts=3) == []
@@ -2,44 +2,35 @@ import streamlit as st
 import folium
 from streamlit_folium import folium_static
 from folium.plugins import HeatMap
-import pandas as pd
-import altair as alt
+from incident_data import load_incident_data
+from incident_charts import date_count_spec, show_chart
+from incident_map import heat_data
 
-# Sample data (replace with your actual data loading code)
-df = pd.read_csv('output_updated.csv')
-
-# Convert 'Event Time' column to datetime
-df['Event Time'] = pd.to_datetime(df['Event Time'])
-
-# Count the frequency of each district
-district_counts = df['District'].value_counts().reset_index()
-district_counts.columns = ['District', 'Count']
-
-# Count the frequency of each region
-region_counts = df['Region'].value_counts().reset_index()
-region_counts.columns = ['Region', 'Count']
-
-client_counts = df['Client'].value_counts().reset_index()
-client_counts.columns = ['Client', 'Count']
-
-# Define the custom order for regions
-custom_region_order = ['RIO-1', 'RIO-2', 'RIO-3', 'RIO-4']
-
-# Sort the regions based on the custom order
-sorted_regions = sorted(region_counts['Region'].unique(), key=lambda x: custom_region_order.index(x) if x in custom_region_order else float('inf'))
+# Load the incidents once per version of output_updated.csv. Remarks/Task
+# Comments stay on disk.
+incidents = load_incident_data('output_updated.csv')
+index = incidents.index
+cube = incidents.cube
+df = incidents.data
 
 # Streamlit app title
 st.title("Network outages in Bangladesh")
 
 # Sidebar for filtering options
-selected_region = st.sidebar.selectbox("Select a Region", ['Overall'] + sorted_regions)
-if selected_region != 'Overall':
-    districts_in_selected_region = list(df[df['Region'] == selected_region]['District'].unique())
-    selected_district = st.sidebar.selectbox("Select a District", ['Overall'] + districts_in_selected_region)
-else:
-    selected_district = st.sidebar.selectbox("Select a District", ['Overall'] + list(district_counts['District']))
-
-selected_clients = st.sidebar.multiselect("Select Clients", list(client_counts['Client']))
+# Options and their ticket counts are lookups in the precomputed dimension hierarchy
+selected_region = st.sidebar.selectbox(
+    "Select a Region", ['Overall'] + incidents.sorted_regions, format_func=incidents.option_counts('Region')
+)
+districts_in_selected_region = incidents.districts_in_region(selected_region)
+selected_district = st.sidebar.selectbox(
+    "Select a District", ['Overall'] + districts_in_selected_region,
+    format_func=incidents.option_counts('District', selected_region)
+)
+
+selected_clients = st.sidebar.multiselect(
+    "Select Clients", incidents.clients_in_district(selected_district, selected_region),
+    format_func=incidents.option_counts('Client', selected_region, selected_district)
+)
 
 # Date range selection with a custom format
 date_range = st.sidebar.date_input("Select Date Range", [df['Event Time'].min(), df['Event Time'].max()], key="daterange")
@@ -47,30 +38,21 @@ date_range = st.sidebar.date_input("Select Date Range", [df['Event Time'].min(),
 # Check if both elements of the date_range tuple are not None
 if date_range[0] is not None and date_range[1] is not None:
     # Filter DataFrame based on selected region, district, date range, and clients
-    filtered_df = df.copy()
-
-    if selected_region != 'Overall':
-        filtered_df = filtered_df[filtered_df['Region'] == selected_region]
-
-    if selected_district != 'Overall':
-        filtered_df = filtered_df[filtered_df['District'] == selected_district]
-
-    filtered_df = filtered_df[(filtered_df['Event Time'].dt.date >= pd.to_datetime(date_range[0]).date()) & (filtered_df['Event Time'].dt.date <= pd.to_datetime(date_range[1]).date())]
-
-    if selected_clients:
-        filtered_df = filtered_df[filtered_df['Client'].isin(selected_clients)]
+    filters = (selected_region, selected_district, selected_clients, date_range)
+    filtered_df = index.select(*filters)
 
     # Display total count based on the applied filters
-    total_count = len(filtered_df)
+    total_count = cube.total(*filters)
     st.sidebar.markdown(f"<p style='font-size:16px'>Total Count: <strong>{total_count}</strong></p>", unsafe_allow_html=True)
 
 
     # Create a Folium map centered on Bangladesh
     m = folium.Map(location=[23.6850, 90.3563], zoom_start=6)
 
-    # Add HeatMap layer with the frequency data
-    heat_data = filtered_df[['Latitude', 'Longitude']].values
-    HeatMap(heat_data).add_to(m)
+    # Add HeatMap layer with the incident count per grid cell
+    filter_state = ('withSliderDate', incidents.version, selected_region, selected_district, tuple(selected_clients), tuple(date_range))
+    heat_points = heat_data(filter_state, filtered_df)
+    HeatMap(heat_points).add_to(m)
 
     # Add layer control to the map
     folium.LayerControl().add_to(m)
@@ -88,32 +70,10 @@ if date_range[0] is not None and date_range[1] is not None:
     st.markdown("<br>", unsafe_allow_html=True)
 
     # Interactive bar chart based on date
-    date_count = filtered_df['Event Time'].dt.date.value_counts().reset_index()
-    date_count.columns = ['Date', 'Count']
-
-    # Create Altair bar chart with total count
-    bar_chart = alt.Chart(date_count).mark_bar().encode(
-        x=alt.X('Date', title='Date', axis=alt.Axis(format='%Y-%m-%d')),  # Display only the date without time
-        y='Count:Q',
-        tooltip=['Date', 'Count']
-    ).properties(
-        title='Incident Count by Date'
-    )
-
-    # Add text layer for total count on top of bars
-    text = bar_chart.mark_text(
-        align='center',
-        color='blue',
-        fontWeight='bold',  # This line sets the font weight to bold
-        fontSize=15,
-        baseline='bottom',
-        dy=-5  # Adjust the vertical position of the text
-    ).encode(
-        text='Count:Q'
-    )
-
-    # Display the chart with total count
-    st.altair_chart(bar_chart + text, use_container_width=True)
+    date_count = cube.daily_counts(*filters)
+
+    # Bar chart with total count on top of bars, from the compiled template
+    show_chart(date_count_spec(), date_count)
 else:
     # Display a message when a date is not chosen
     st.sidebar.warning("Please enter a date.")